@@ -3,21 +3,17 @@
 import os
 import json
 import click
-import requests
+from typing import TYPE_CHECKING
 from rich import print as rprint
 from rich.panel import Panel
 from rich import box
-from libfetch.combined_libs import parse_workspace_for_libraries  # Library detection
-from scraping.scrape import scrape_full_documentation  # Scraping function
-from scraping.test_model_query import get_ai_response  # AI response function
+from scraping.models import parse_keep_alive
 
-# For colored input
-from prompt_toolkit import PromptSession
-from prompt_toolkit.styles import Style
-
-# Style so that typed text is blue
-session_style = Style.from_dict({'': 'ansiblue'})
-session = PromptSession(style=session_style)
+# Subcommand dependencies (scraping, models, FAISS, Ollama, prompt_toolkit) are imported
+# inside the commands that need them so `alexandria --help` and `init` start instantly.
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from scraping.search import SearchEngine
 
 
 @click.group()
@@ -43,7 +39,11 @@ def init(directory=None):
 
 @cli.command()
 @click.argument("directory", required=False)
-def scan(directory=None):
+@click.option("--index-type", type=click.Choice(["auto", "flat", "hnsw", "ivfpq"]), default="auto", show_default=True,
+              help="FAISS index type; auto picks one by the number of sections.")
+@click.option("--quantization", type=click.Choice(["none", "fp16", "int8"]), default="fp16", show_default=True,
+              help="How flat and HNSW indexes store vectors on disk.")
+def scan(directory=None, index_type="auto", quantization="fp16"):
     """Scans the given workspace directory for libraries and scrapes their documentation."""
     
     target_dir = os.path.abspath(directory) if directory else os.getcwd()
@@ -53,6 +53,10 @@ def scan(directory=None):
         click.echo(f"❌ Error: The .alexandria directory is missing in {target_dir}. Run 'alexandria init' first.")
         return
 
+    from libfetch.combined_libs import parse_workspace_for_libraries  # Library detection
+    from scraping.scrape import scrape_full_documentation  # Scraping function
+    from scraping.search import update_indexes  # Persistent search indexes
+
     # Detect libraries
     click.echo(f"🔍 Scanning workspace at {target_dir} for libraries...")
     parse_workspace_for_libraries(alexandria_path, target_dir)
@@ -86,10 +90,27 @@ def scan(directory=None):
 
     click.echo("✅ All detected libraries have been scraped!")
 
+    # Build the search indexes once here so chat queries only have to load them
+    click.echo("🧠 Building search indexes...")
+    if update_indexes(alexandria_path, index_type, quantization) is None:
+        click.echo("⚠️ No documentation sections found. Skipping indexing.")
+        return
+    click.echo(f"✅ Search indexes saved to {os.path.join(alexandria_path, 'vectordb')}")
+
 
 @cli.command()
 @click.argument("directory", required=False, type=click.Path(exists=False))
-def chat(directory=None):
+@click.option("--search-mode", type=click.Choice(["title", "hybrid"]), default="hybrid", show_default=True,
+              help="title: title index only; hybrid: fuse title, paragraph BM25 and code search.")
+@click.option("--context-tokens", type=int, default=1200, show_default=True,
+              help="Approximate token budget for the documentation included in each prompt.")
+@click.option("--keep-alive", default="30m", show_default=True,
+              help="How long Ollama keeps the chat model loaded between questions (e.g. 30m, 1h, or -1 for always).")
+@click.option("--answer-cache/--no-answer-cache", default=True, show_default=True,
+              help="Reuse answers to earlier, near-identical questions about unchanged docs.")
+@click.option("--history-tokens", type=int, default=4096, show_default=True,
+              help="Approximate token budget for earlier turns kept in the conversation.")
+def chat(directory=None, search_mode="hybrid", context_tokens=1200, keep_alive="30m", answer_cache=True, history_tokens=4096):
     """Launch the Alexandria chat interface with contextual knowledge from a given directory."""
     
     target_dir = os.path.abspath(directory) if directory else os.getcwd()
@@ -109,36 +130,167 @@ def chat(directory=None):
         )
     )
 
+    # Load the search engine and the Ollama model in the background while the prompt is up
+    engine_future = warm_up_session(alexandria_path, search_mode, parse_keep_alive(keep_alive))
+
+    from scraping.answer_cache import AnswerCache
+    from scraping.conversation import Conversation
+    cache = AnswerCache(alexandria_path) if answer_cache else None
+    conversation = Conversation(history_tokens=history_tokens)
+
+    # For colored input
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.patch_stdout import patch_stdout
+    from prompt_toolkit.styles import Style
+
+    # Style so that typed text is blue
+    session_style = Style.from_dict({'': 'ansiblue'})
+    session = PromptSession(style=session_style)
+
     while True:
         try:
-            # Prompt user for input
-            user_input = session.prompt(">> ")
+            # Prompt user for input; warm-up messages are printed above the prompt
+            with patch_stdout():
+                user_input = session.prompt(">> ")
 
             if user_input.lower() in ("exit", "quit"):
                 rprint(Panel("Exiting chat...", border_style="red", box=box.ROUNDED))
                 break
 
+            if user_input.strip().lower() == "/clear":
+                conversation.clear()
+                rprint(Panel("Conversation cleared.", border_style="green", box=box.ROUNDED))
+                continue
+
             # Display user input
             rprint(Panel(f"[bold blue]User:[/bold blue] {user_input}", border_style="blue", box=box.ROUNDED))
 
-            # Fetch AI response with context
-            response = fetch_ollama_response(user_input, alexandria_path)
-            rprint(Panel(f"[bold magenta]Assistant:[/bold magenta] {response}", border_style="magenta", box=box.ROUNDED))
+            if not engine_future.done():
+                rprint("[dim]⏳ Still loading the search indexes...[/dim]")
+            try:
+                engine = engine_future.result()
+            except Exception as e:
+                rprint(Panel(f"❌ Error loading the search indexes: {e}", border_style="red", box=box.ROUNDED))
+                break
+
+            # Stream the AI response with context into a live panel
+            print_streamed_response(stream_ollama_response(user_input, engine, context_tokens, keep_alive, cache, conversation))
 
         except KeyboardInterrupt:
             rprint(Panel("Exiting chat...", border_style="red", box=box.ROUNDED))
             break
 
 
-def fetch_ollama_response(user_message: str, directory: str) -> str:
+def warm_up_session(alexandria_path: str, search_mode: str, keep_alive) -> "Future":
     """
-    Uses Alexandria's LLM response function to generate a reply based on stored documentation.
+    Start loading the search engine (models and indexes) and the Ollama chat model on
+    background threads so both are ready by the time the first question is typed.
+    Returns a future for the engine. The Ollama warm-up is best effort: if it fails,
+    the error shows up on the first question instead.
     """
-    try:
-        response = get_ai_response(user_message, directory)  # ✅ Passes directory correctly
-        return response
-    except Exception as e:
-        return f"Error calling Alexandria LLM: {str(e)}"
+    import threading
+    from concurrent.futures import Future
+
+    engine_future = Future()
+
+    def start_engine():
+        try:
+            from scraping.search import SearchEngine
+            engine = SearchEngine(alexandria_path, mode=search_mode)
+            engine.warm_up()
+            engine_future.set_result(engine)
+        except Exception as e:
+            engine_future.set_exception(e)
+
+    def start_llm():
+        try:
+            from scraping.test_model_query import warm_up_llm
+            warm_up_llm(keep_alive)
+        except Exception:
+            pass
+
+    # Daemon threads, so quitting right away doesn't wait for the models to load
+    threading.Thread(target=start_engine, daemon=True).start()
+    threading.Thread(target=start_llm, daemon=True).start()
+    return engine_future
+
+
+@cli.command("query-batch")
+@click.argument("questions_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("directory", required=False)
+@click.option("--output", "-o", type=click.Path(dir_okay=False), default="results.jsonl", show_default=True,
+              help="JSONL file to write one result line per question to.")
+@click.option("-k", "k", default=3, show_default=True, help="Sections to return per question.")
+@click.option("--search-mode", type=click.Choice(["title", "hybrid"]), default="hybrid", show_default=True)
+def query_batch(questions_file, directory=None, output="results.jsonl", k=3, search_mode="hybrid"):
+    """Run retrieval for every question in a file (one per line, or JSONL with a "query" field)."""
+
+    target_dir = os.path.abspath(directory) if directory else os.getcwd()
+    alexandria_path = os.path.join(target_dir, ".alexandria")
+
+    if not os.path.exists(alexandria_path):
+        click.echo(f"❌ Error: The .alexandria directory is missing in {target_dir}. Run 'alexandria init' first.")
+        return
+
+    from scraping.search import SearchEngine
+    from scraping.query_processing import normalize_query
+
+    questions = []
+    with open(questions_file, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                questions.append(json.loads(line)["query"] if line.startswith("{") else line)
+
+    click.echo(f"🔎 Searching {len(questions)} questions...")
+    engine = SearchEngine(alexandria_path, mode=search_mode)
+    # Same normalization chat applies before searching
+    clean_queries = [normalize_query(question) for question in questions]
+    all_results = engine.search_batch(clean_queries, k)
+
+    with open(output, "w", encoding="utf-8") as file:
+        for question, clean_query, results in zip(questions, clean_queries, all_results):
+            file.write(json.dumps({"query": question, "clean_query": clean_query, "results": results}, ensure_ascii=False) + "\n")
+
+    click.echo(f"✅ Results written to {output}")
+
+
+def stream_ollama_response(user_message: str, engine: "SearchEngine", context_tokens: int = 1200, keep_alive="30m",
+                           cache=None, conversation=None):
+    """
+    Uses Alexandria's LLM response function to stream a reply based on stored documentation.
+    """
+    from scraping.test_model_query import stream_ai_response  # AI response function
+
+    return stream_ai_response(user_message, engine, context_tokens, parse_keep_alive(keep_alive), cache, conversation)  # ✅ Reuses the session search engine
+
+
+def print_streamed_response(chunks) -> str:
+    """
+    Render a streamed reply into a live-updating panel as it arrives.
+    Ctrl-C stops the generation and keeps what was received so far; returns the reply text.
+    """
+    from rich.live import Live
+    from rich.markup import escape
+
+    text = ""
+
+    def panel(note=""):
+        body = escape(text) if text else "[dim]…[/dim]"
+        return Panel(f"[bold magenta]Assistant:[/bold magenta] {body}{note}", border_style="magenta", box=box.ROUNDED)
+
+    with Live(panel(), refresh_per_second=15, vertical_overflow="visible") as live:
+        try:
+            for chunk in chunks:
+                text += chunk
+                live.update(panel())
+        except KeyboardInterrupt:
+            chunks.close()  # Drops the connection so Ollama stops generating
+            live.update(panel(" [dim](cancelled)[/dim]"))
+        except Exception as e:
+            text = f"Error calling Alexandria LLM: {str(e)}"
+            live.update(panel())
+    return text
 
 
 def main():
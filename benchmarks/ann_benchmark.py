@@ -0,0 +1,109 @@
+"""
+Recall-vs-latency benchmark for the FAISS index types in scraping/ann_index.py.
+
+Uses the title embeddings of a scanned workspace, or a synthetic corpus, and reports
+recall@k against exact (flat) search, build time, query latency and index memory.
+Exits with status 1 if the index type "auto" picks for the corpus size misses
+ann_index.RECALL_TARGET, the recall the size thresholds are chosen to meet.
+
+    python benchmarks/ann_benchmark.py --embeddings path/to/.alexandria/vectordb/<library>/index/title_embeddings.npy
+    python benchmarks/ann_benchmark.py --synthetic 250000 --json ann.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraping.ann_index import RECALL_TARGET, build_faiss_index, choose_index_type
+
+
+def synthetic_corpus(num_vectors, dim, seed=0):
+    """Clustered unit vectors, closer to sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, num_vectors // 200), dim)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=num_vectors)] + 0.3 * rng.normal(size=(num_vectors, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(corpus, num_queries, seed=1):
+    """Perturbed corpus vectors, so each query has a meaningful neighbourhood."""
+    rng = np.random.default_rng(seed)
+    queries = corpus[rng.integers(len(corpus), size=num_queries)] + 0.05 * rng.normal(size=(num_queries, corpus.shape[1])).astype(np.float32)
+    return np.ascontiguousarray(queries, dtype=np.float32)
+
+
+def benchmark_index(index_type, corpus, queries, truth, k, quantization):
+    start = time.perf_counter()
+    index = build_faiss_index(corpus, index_type, quantization)
+    build_seconds = time.perf_counter() - start
+
+    # One query at a time, the way chat uses the index
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return {
+        "index_type": index_type,
+        "build_s": round(build_seconds, 3),
+        f"recall@{k}": round(float(recall), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "memory_mb": round(faiss.serialize_index(index).nbytes / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embeddings", help="Path to a .npy embedding matrix (e.g. title_embeddings.npy)")
+    parser.add_argument("--synthetic", type=int, default=50_000, help="Synthetic corpus size when --embeddings is not given")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--types", default="flat,hnsw,ivfpq", help="Comma-separated index types to compare")
+    parser.add_argument("--quantization", default="fp16", help="Vector storage for flat/HNSW: none, fp16 or int8")
+    parser.add_argument("--min-recall", type=float, default=RECALL_TARGET, help="Recall@k the auto-picked index type must reach")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    if args.embeddings:
+        corpus = np.ascontiguousarray(np.load(args.embeddings), dtype=np.float32)
+    else:
+        corpus = synthetic_corpus(args.synthetic, args.dim)
+    queries = make_queries(corpus, args.queries)
+
+    # Ground truth from exact search
+    exact = faiss.IndexFlatL2(corpus.shape[1])
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    auto_type = choose_index_type(corpus.shape[0])
+    print(f"Corpus: {corpus.shape[0]} x {corpus.shape[1]} (auto would pick '{auto_type}'), {args.queries} queries, k={args.k}")
+    results = [benchmark_index(index_type, corpus, queries, truth, args.k, args.quantization) for index_type in args.types.split(",")]
+
+    columns = list(results[0].keys())
+    print("  ".join(f"{c:>12}" for c in columns))
+    for row in results:
+        print("  ".join(f"{row[c]:>12}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"num_vectors": corpus.shape[0], "dim": corpus.shape[1], "k": args.k, "quantization": args.quantization, "results": results}, file, indent=4)
+
+    missed = [row for row in results if row[f"recall@{args.k}"] < args.min_recall]
+    for row in missed:
+        print(f"{'❌' if row['index_type'] == auto_type else '⚠️'} {row['index_type']}: recall@{args.k} {row[f'recall@{args.k}']} is below {args.min_recall}")
+    if any(row["index_type"] == auto_type for row in missed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
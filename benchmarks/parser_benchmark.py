@@ -0,0 +1,109 @@
+"""
+HTML parsing benchmark for the parser backends in scraping/html_parser.py.
+
+Parses every saved page in benchmarks/fixtures/html with each backend, reports the
+time per page (best of --repeat runs) and the speed-up over html.parser, and checks
+that every backend extracts exactly the same links and sections. Exits with status 1
+if any output differs.
+
+    python benchmarks/parser_benchmark.py
+    python benchmarks/parser_benchmark.py --repeat 20 --json parsers.json
+"""
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from scraping.html_parser import PARSERS
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures", "html")
+REFERENCE_PARSER = "html.parser"
+
+
+def time_parse(parse, html, url, repeat):
+    """Best wall time of `repeat` parses, in milliseconds, and the parse output."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = parse(html, url)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, output
+
+
+def normalized(output):
+    """Parse output with the anchors in a fixed order (they are only ever used as a set)."""
+    anchors, sections = output
+    return sorted(anchors), sections
+
+
+def run(args):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.fixtures, "*.html"))):
+        with open(path, "r", encoding="utf-8", newline="") as file:  # line endings as saved
+            html = file.read()
+        url = f"https://docs.example.com/{os.path.basename(path)}"
+
+        timings, identical = {}, True
+        reference = None
+        for name, parse in PARSERS.items():
+            milliseconds, output = time_parse(parse, html, url, args.repeat)
+            timings[name] = round(milliseconds, 3)
+            if name == REFERENCE_PARSER:
+                reference = normalized(output)
+            elif normalized(output) != reference:
+                identical = False
+        _, sections = reference
+        pages.append({
+            "page": os.path.basename(path),
+            "kb": round(len(html.encode("utf-8")) / 1024, 1),
+            "sections": len(sections or []),
+            "ms": timings,
+            "identical": identical,
+        })
+
+    totals = {name: round(sum(page["ms"][name] for page in pages), 3) for name in PARSERS}
+    return {
+        "repeat": args.repeat,
+        "pages": pages,
+        "total_ms": totals,
+        "speedup": {name: round(totals[REFERENCE_PARSER] / total, 2) for name, total in totals.items() if total},
+        "identical": all(page["identical"] for page in pages),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES, help="Directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=5, help="Parses per page and backend; the best time is reported")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    names = list(PARSERS)
+    print(f"{'page':>24} {'KB':>7} {'sections':>8} " + " ".join(f"{name + ' ms':>15}" for name in names) + "  identical")
+    for page in report["pages"]:
+        print(f"{page['page']:>24} {page['kb']:>7} {page['sections']:>8} "
+              + " ".join(f"{page['ms'][name]:>15}" for name in names) + f"  {'✅' if page['identical'] else '❌'}")
+    print(f"{'total':>24} {'':>7} {'':>8} " + " ".join(f"{report['total_ms'][name]:>15}" for name in names))
+    for name, speedup in report["speedup"].items():
+        if name != REFERENCE_PARSER:
+            print(f"{name}: {speedup}x faster than {REFERENCE_PARSER}")
+    if len(names) == 1:
+        print("⚠️ lxml is not installed; only html.parser was measured")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+
+    if not report["identical"]:
+        print("❌ Backends extracted different links or sections")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+End-to-end retrieval benchmark over the checked-in fixture corpus.
+
+Indexes benchmarks/fixtures/corpus (structured_docs.json per library) in a scratch
+workspace, then runs the labelled queries in benchmarks/fixtures/queries.jsonl through
+SearchEngine and reports index build time, per-query latency percentiles, batch
+throughput, recall@k, MRR and peak RSS. Runs offline: the embedding models must
+already be in the local Hugging Face cache.
+
+    python benchmarks/retrieval_benchmark.py --json before.json
+    python benchmarks/retrieval_benchmark.py --json after.json --baseline before.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+# No network: fail fast instead of downloading models
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from scraping import models, query_processing
+from scraping.search import SearchEngine, update_indexes
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+
+# Metrics compared by --baseline, and whether higher is better
+COMPARED_METRICS = {
+    "build_s": False,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "batch_qps": True,
+    "recall": True,
+    "mrr": True,
+    "peak_rss_mb": False,
+}
+
+
+def load_queries(path):
+    """Labelled queries: {"query": ..., "relevant": [{"library": ..., "title": ...}]} per line."""
+    with open(path, "r", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def result_sections(results):
+    """
+    (library, title) of each distinct section among the results, best first. Results are
+    chunks, so a section split into several chunks would otherwise count more than once.
+    A section too small to be its own chunk is merged into a neighbour and returned under
+    the neighbour's title, so labels naming it can never be matched.
+    """
+    sections = []
+    for result in results:
+        key = (result.get("library"), result["title"])
+        if key not in sections:
+            sections.append(key)
+    return sections
+
+
+def relevant_ranks(results, relevant):
+    """1-based ranks, among the distinct result sections, of those labelled relevant."""
+    wanted = {(r["library"], r["title"]) for r in relevant}
+    return [rank for rank, key in enumerate(result_sections(results), start=1) if key in wanted]
+
+
+def recall_at_k(results, relevant):
+    return len(relevant_ranks(results, relevant)) / len(relevant)
+
+
+def reciprocal_rank(results, relevant):
+    ranks = relevant_ranks(results, relevant)
+    return 1.0 / ranks[0] if ranks else 0.0
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, or None where getrusage is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def make_workspace(corpus, workspace):
+    """Copy the fixture corpus into a fresh .alexandria/vectordb/."""
+    alexandria_path = os.path.join(workspace, ".alexandria")
+    for library in sorted(os.listdir(corpus)):
+        shutil.copytree(os.path.join(corpus, library), os.path.join(alexandria_path, "vectordb", library))
+    return alexandria_path
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 3)
+
+
+def run(args):
+    queries = load_queries(args.queries)
+
+    # Loaded up front so build time measures indexing rather than model start-up
+    start = time.perf_counter()
+    models.get_text_model()
+    models.get_code_model()
+    model_load_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as workspace:
+        alexandria_path = make_workspace(args.corpus, workspace)
+
+        start = time.perf_counter()
+        update_indexes(alexandria_path, args.index_type, args.quantization)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine = SearchEngine(alexandria_path, mode=args.mode)
+        load_seconds = time.perf_counter() - start
+
+        clean_queries = [query_processing.normalize_query(q["query"]) for q in queries]
+        engine.search(clean_queries[0], args.k)  # warm-up
+
+        # One query at a time, the way chat searches, including query encoding
+        latencies = []
+        per_query = []
+        for _ in range(args.repeat):
+            per_query = []
+            for query, clean_query in zip(queries, clean_queries):
+                query_processing.encode_query.cache_clear()
+                start = time.perf_counter()
+                results = engine.search(clean_query, args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                per_query.append({
+                    "query": query["query"],
+                    "recall": recall_at_k(results, query["relevant"]),
+                    "rr": reciprocal_rank(results, query["relevant"]),
+                    "results": [[r.get("library"), r["title"]] for r in results],
+                })
+
+        query_processing.encode_query.cache_clear()
+        start = time.perf_counter()
+        engine.search_batch(clean_queries, args.k)
+        batch_seconds = time.perf_counter() - start
+
+        num_sections = sum(len(shard.sections) for shard in engine.shards.values())
+
+    return {
+        "commit": git_commit(),
+        "config": {"mode": args.mode, "k": args.k, "index_type": args.index_type, "quantization": args.quantization, "repeat": args.repeat},
+        "corpus": {"libraries": len(os.listdir(args.corpus)), "sections": num_sections, "queries": len(queries)},
+        "model_load_s": round(model_load_seconds, 3),
+        "build_s": round(build_seconds, 3),
+        "load_s": round(load_seconds, 3),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "batch_qps": round(len(queries) / batch_seconds, 1),
+        "recall": round(float(np.mean([q["recall"] for q in per_query])), 4),
+        "mrr": round(float(np.mean([q["rr"] for q in per_query])), 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "per_query": per_query,
+    }
+
+
+def compare(report, baseline):
+    """Print each metric next to the baseline's, flagging regressions."""
+    print(f"\nvs baseline {baseline.get('commit') or ''}")
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        old, new = baseline.get(metric), report.get(metric)
+        if old is None or new is None:
+            continue
+        worse = new < old if higher_is_better else new > old
+        change = f"{(new - old) / old:+.1%}" if old else "n/a"
+        print(f"  {metric:>12}: {old:>10} -> {new:>10}  {change}{'  ⚠️' if worse and old and abs(new - old) / old > 0.05 else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(FIXTURES, "corpus"), help="Directory with one <library>/structured_docs.json per library")
+    parser.add_argument("--queries", default=os.path.join(FIXTURES, "queries.jsonl"), help="Labelled queries (JSONL)")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--mode", default="hybrid", choices=["title", "hybrid"])
+    parser.add_argument("--index-type", default="auto", help="auto, flat, hnsw or ivfpq")
+    parser.add_argument("--quantization", default="fp16", help="none, fp16 or int8")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the queries for the latency numbers")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Earlier --json report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    corpus = report["corpus"]
+    print(f"Corpus: {corpus['libraries']} libraries, {corpus['sections']} sections, {corpus['queries']} queries; mode={args.mode}, k={args.k}")
+    for metric in ["model_load_s", "build_s", "load_s", "p50_ms", "p95_ms", "p99_ms", "batch_qps", "recall", "mrr", "peak_rss_mb"]:
+        label = f"recall@{args.k}" if metric == "recall" else metric
+        print(f"  {label:>12}: {report[metric]}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            compare(report, json.load(file))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,10 @@ import requests
 from rich import print as rprint
 from rich.panel import Panel
 from rich import box
-from scraping.test_model_query import get_ai_response 
 
 # For colored input
 from prompt_toolkit import PromptSession
+from prompt_toolkit.patch_stdout import patch_stdout
 from prompt_toolkit.styles import Style
 
 # Style so that typed text is blue
@@ -76,10 +76,20 @@ def chat(directory=None):
         )
     )
 
+    from alexandria.cli import print_streamed_response, stream_ollama_response, warm_up_session
+    from scraping.models import LLM_KEEP_ALIVE
+
+    # Load models, indexes and the Ollama model in the background, once for the whole session
+    engine_future = warm_up_session(alexandria_path, "hybrid", LLM_KEEP_ALIVE)
+
+    from scraping.conversation import Conversation
+    conversation = Conversation()
+
     while True:
         try:
-            # Prompt user for input in blue
-            user_input = session.prompt(">> ")
+            # Prompt user for input in blue; warm-up messages are printed above the prompt
+            with patch_stdout():
+                user_input = session.prompt(">> ")
 
             # Allow user to exit
             if user_input.lower() in ("exit", "quit"):
@@ -98,30 +108,19 @@ def chat(directory=None):
                 )
             )
 
-            # Fetch assistant response with context
-            response = fetch_ollama_response(user_input, alexandria_path)
-            rprint(
-                Panel(
-                    f"[bold magenta]Assistant:[/bold magenta] {response}",
-                    border_style="magenta",
-                    box=box.ROUNDED
-                )
-            )
+            try:
+                engine = engine_future.result()
+            except Exception as e:
+                rprint(Panel(f"❌ Error loading the search indexes: {e}", border_style="red", box=box.ROUNDED))
+                break
+
+            # Stream the assistant response with context into a live panel
+            print_streamed_response(stream_ollama_response(user_input, engine, conversation=conversation))
 
         except KeyboardInterrupt:
             rprint(Panel("Exiting chat...", border_style="red", box=box.ROUNDED))
             break
 
-def fetch_ollama_response(user_message: str, directory: str) -> str:
-    """
-    Uses Alexandria's LLM response function to generate a reply based on stored documentation.
-    """
-    try:
-        response = get_ai_response(user_message, directory)  # Uses the correct function
-        return response
-    except Exception as e:
-        return f"Error calling Alexandria LLM: {str(e)}"
-
 def main():
     cli()
 
@@ -1,5 +1,5 @@
 import importlib.util
-import requests
+from scraping.http_client import get_http_client
 from bs4 import BeautifulSoup  # pip install beautifulsoup4
 from rapidfuzz import process, fuzz  # pip install rapidfuzz
 
@@ -10,7 +10,7 @@ def get_candidate_pool():
     # Download a list of top PyPI packages from Hugovk’s Top PyPI Packages (30-day list)
     url = "https://hugovk.github.io/top-pypi-packages/top-pypi-packages-30-days.min.json"
     try:
-        response = requests.get(url)
+        response = get_http_client().get(url)
         response.raise_for_status()
         data = response.json()
         # "rows" is a list of dictionaries with a "project" key.
@@ -47,7 +47,7 @@ def get_stdlib_doc_url(library_name):
 
 def get_pypi_doc_url(library_name):
     url = f"https://pypi.org/pypi/{library_name}/json"
-    response = requests.get(url)
+    response = get_http_client().get(url)
     if response.status_code == 200:
         info = response.json().get('info', {})
         urls = info.get('project_urls') or {}
@@ -123,7 +123,7 @@ def get_rust_doc_url(library_name):
 # =============================
 def scrape_pypi_search(user_input):
     search_url = f"https://pypi.org/search/?q={user_input}"
-    response = requests.get(search_url)
+    response = get_http_client().get(search_url)
     if response.status_code != 200:
         return []
     soup = BeautifulSoup(response.text, 'html.parser')
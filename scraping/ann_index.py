@@ -0,0 +1,95 @@
+import math
+import faiss
+import numpy as np
+
+# FAISS index types for the title and code indexes.
+# "auto" picks one by corpus size: exact search while it is cheap, HNSW for
+# mid-sized corpora, IVF-PQ for large ones. PQ codes alone lose too much precision
+# (recall@10 around 0.55 against exact search), so IVF-PQ candidates are re-ranked
+# against the stored vectors, which brings it back above RECALL_TARGET.
+INDEX_TYPES = ["auto", "flat", "hnsw", "ivfpq"]
+HNSW_MIN_VECTORS = 20_000
+IVFPQ_MIN_VECTORS = 100_000  # beyond this HNSW needs an ever larger efSearch to hold RECALL_TARGET
+
+# recall@10 against exact search that every index type "auto" picks must reach on
+# benchmarks/ann_benchmark.py (which checks it) at the sizes it picks that type for
+RECALL_TARGET = 0.95
+
+# Scalar quantization of the vectors stored by flat and HNSW indexes and of the vectors
+# IVF-PQ re-ranks with: float16 halves memory, int8 quarters it.
+QUANTIZATIONS = {
+    "none": None,
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# Build/search parameters
+HNSW_NEIGHBORS = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 256
+PQ_BITS = 8
+PQ_DIMS_PER_SUBQUANTIZER = 8
+IVF_NPROBE = 32
+REFINE_K_FACTOR = 10  # IVF-PQ candidates re-ranked per requested result
+IVF_TRAINING_POINTS_PER_CENTROID = 39
+IVF_MAX_TRAINING_POINTS = 100_000
+
+def choose_index_type(num_vectors):
+    """Pick the index type "auto" resolves to for a corpus of num_vectors."""
+    if num_vectors >= IVFPQ_MIN_VECTORS:
+        return "ivfpq"
+    if num_vectors >= HNSW_MIN_VECTORS:
+        return "hnsw"
+    return "flat"
+
+def pq_subquantizers(dim):
+    """Largest PQ subquantizer count that divides dim with about PQ_DIMS_PER_SUBQUANTIZER dims each."""
+    m = max(1, dim // PQ_DIMS_PER_SUBQUANTIZER)
+    while dim % m:
+        m -= 1
+    return m
+
+def build_faiss_index(embeddings, index_type="auto", quantization="fp16"):
+    """Build an L2 FAISS index of the requested type over embeddings."""
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    num_vectors, dim = embeddings.shape
+
+    if index_type == "auto":
+        index_type = choose_index_type(num_vectors)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {', '.join(INDEX_TYPES)}")
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}', expected one of {', '.join(QUANTIZATIONS)}")
+    qtype = QUANTIZATIONS[quantization]
+
+    # IVF-PQ needs enough points to train both the coarse centroids and the PQ codebooks
+    if index_type == "ivfpq" and num_vectors < IVF_TRAINING_POINTS_PER_CENTROID * (1 << PQ_BITS):
+        print(f"⚠️ Only {num_vectors} vectors, too few to train IVF-PQ. Using HNSW instead.")
+        index_type = "hnsw"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim) if qtype is None else faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_L2)
+        index.train(embeddings)  # int8 learns per-dimension ranges; a no-op otherwise
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_NEIGHBORS) if qtype is None else faiss.IndexHNSWSQ(dim, qtype, HNSW_NEIGHBORS)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        index.train(embeddings)
+    else:
+        nlist = max(1, int(4 * math.sqrt(num_vectors)))
+        nlist = min(nlist, num_vectors // IVF_TRAINING_POINTS_PER_CENTROID)
+        quantizer = faiss.IndexFlatL2(dim)
+        ivfpq = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_subquantizers(dim), PQ_BITS)
+        ivfpq.nprobe = min(IVF_NPROBE, nlist)
+        refine = faiss.IndexFlatL2(dim) if qtype is None else faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_L2)
+        index = faiss.IndexRefine(ivfpq, refine)
+        index.k_factor = REFINE_K_FACTOR
+
+        # Train on a random sample; the full corpus adds little and costs a lot
+        rng = np.random.default_rng(0)
+        sample_size = min(num_vectors, IVF_MAX_TRAINING_POINTS)
+        sample = embeddings[rng.choice(num_vectors, sample_size, replace=False)] if sample_size < num_vectors else embeddings
+        index.train(sample)
+
+    index.add(embeddings)
+    return index
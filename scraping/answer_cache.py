@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import numpy as np
+
+# Semantic answer cache stored in .alexandria/answer_cache/: a question whose query
+# embedding is close enough to an earlier one gets that earlier answer back without
+# retrieval or generation. Every entry is tagged with the version of the indexes (and
+# chat settings) it was answered from, so a rescan that changes the docs retires it.
+# Follow-up questions also carry a hash of the conversation history they were asked after,
+# and only match after that same history.
+ANSWER_CACHE_DIR = "answer_cache"
+ENTRIES_FILE = "entries.json"
+VECTORS_FILE = "vectors.npy"
+
+SIMILARITY_THRESHOLD = 0.95        # cosine similarity between query embeddings
+MAX_ENTRIES = 500                  # least recently used answers are evicted first
+TTL_SECONDS = 7 * 24 * 60 * 60     # answers older than this are dropped
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+class AnswerCache:
+    """Persistent (query embedding, version) -> answer cache with LRU and TTL eviction."""
+
+    def __init__(self, directory, threshold=SIMILARITY_THRESHOLD, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.path = os.path.join(directory, ANSWER_CACHE_DIR)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = []  # {"query", "answer", "version", "history", "created", "last_used"}, one per row of vectors
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+        entries_path = os.path.join(self.path, ENTRIES_FILE)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        if os.path.exists(entries_path) and os.path.exists(vectors_path):
+            try:
+                with open(entries_path, "r", encoding="utf-8") as file:
+                    entries = json.load(file)
+                vectors = np.load(vectors_path)
+                if len(entries) == len(vectors):
+                    self.entries, self.vectors = entries, vectors
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable answer cache {self.path}: {e}")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, query_embedding, version, history=""):
+        """The cached answer to the closest earlier question answered at this version (after this history), or None."""
+        if not self.entries:
+            return None
+        query_embedding = unit(query_embedding)
+        if self.vectors.shape[1] != len(query_embedding):
+            return None
+
+        now = time.time()
+        similarity = self.vectors @ query_embedding
+        for row in np.argsort(-similarity):
+            if similarity[row] < self.threshold:
+                break
+            entry = self.entries[row]
+            if entry["version"] == version and entry.get("history", "") == history and now - entry["created"] <= self.ttl:
+                entry["last_used"] = now
+                self.save()
+                return entry["answer"]
+        return None
+
+    def put(self, query, query_embedding, answer, version, history=""):
+        """Remember an answer, evicting stale, expired and least recently used entries."""
+        query_embedding = unit(query_embedding)
+        now = time.time()
+        keep = [
+            row for row, entry in enumerate(self.entries)
+            if entry["version"] == version and now - entry["created"] <= self.ttl
+            and len(self.vectors[row]) == len(query_embedding)
+        ]
+        keep = sorted(keep, key=lambda row: self.entries[row]["last_used"])[-(self.max_entries - 1):] if self.max_entries > 1 else []
+        keep.sort()
+
+        self.entries = [self.entries[row] for row in keep] + [
+            {"query": query, "answer": answer, "version": version, "history": history, "created": now, "last_used": now}
+        ]
+        vectors = self.vectors[keep] if keep else np.zeros((0, len(query_embedding)), dtype=np.float32)
+        self.vectors = np.vstack([vectors, query_embedding[None, :]])
+        self.save()
+
+    def save(self):
+        """Write the cache, replacing the files only once they are complete."""
+        os.makedirs(self.path, exist_ok=True)
+        entries_path = os.path.join(self.path, ENTRIES_FILE)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        with open(vectors_path + ".tmp", "wb") as file:
+            np.save(file, self.vectors)
+        with open(entries_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, ensure_ascii=False)
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(entries_path + ".tmp", entries_path)
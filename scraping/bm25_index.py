@@ -0,0 +1,148 @@
+import os
+import re
+import json
+import numpy as np
+from collections import Counter, defaultdict
+
+# Paragraph-level BM25 over an inverted index built once at scan time.
+# Every paragraph of every section is a document; postings are stored term-major
+# (CSR layout) so scoring a query only touches the postings of its terms.
+TOKEN_RE = re.compile(r"[a-z0-9_]+")
+K1 = 1.5
+B = 0.75
+
+VOCAB_FILE = "vocab.json"
+ARRAY_FILES = ["term_ptr", "doc_ids", "term_freqs", "doc_lens", "idf", "paragraph_ptr"]
+
+def tokenize(text):
+    """Lowercase word tokens; punctuation, dots and dashes split tokens."""
+    return TOKEN_RE.findall(text.lower())
+
+class BM25Index:
+    """Inverted index with precomputed document lengths and IDF for paragraph BM25."""
+
+    def __init__(self, vocab, term_ptr, doc_ids, term_freqs, doc_lens, idf, paragraph_ptr):
+        self.vocab = vocab                  # term -> term id
+        self.term_ptr = term_ptr            # postings of term t are [term_ptr[t], term_ptr[t + 1])
+        self.doc_ids = doc_ids              # paragraph id of each posting
+        self.term_freqs = term_freqs        # term frequency of each posting
+        self.doc_lens = doc_lens            # tokens per paragraph
+        self.idf = idf                      # IDF per term id
+        self.paragraph_ptr = paragraph_ptr  # paragraphs of section i are [paragraph_ptr[i], paragraph_ptr[i + 1])
+        self.avg_doc_len = float(doc_lens.mean()) if len(doc_lens) else 0.0
+
+    @classmethod
+    def build(cls, sections):
+        """Tokenize every paragraph of every section and build the postings."""
+        vocab = {}
+        term_ids, doc_ids, term_freqs, doc_lens = [], [], [], []
+        paragraph_ptr = [0]
+
+        for sec in sections:
+            for paragraph in sec["content"]:
+                tokens = tokenize(paragraph)
+                doc_id = len(doc_lens)
+                doc_lens.append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    term_ids.append(vocab.setdefault(term, len(vocab)))
+                    doc_ids.append(doc_id)
+                    term_freqs.append(tf)
+            paragraph_ptr.append(len(doc_lens))
+
+        term_ids = np.array(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")  # group postings by term, doc ids stay sorted
+        doc_freqs = np.bincount(term_ids, minlength=len(vocab))
+        term_ptr = np.concatenate([[0], np.cumsum(doc_freqs)]).astype(np.int64)
+
+        num_docs = len(doc_lens)
+        idf = np.log1p((num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+
+        return cls(
+            vocab,
+            term_ptr,
+            np.array(doc_ids, dtype=np.int32)[order],
+            np.array(term_freqs, dtype=np.float32)[order],
+            np.array(doc_lens, dtype=np.float32),
+            idf,
+            np.array(paragraph_ptr, dtype=np.int64),
+        )
+
+    def save(self, path):
+        """Write the index as .npy arrays plus a JSON vocabulary under path/."""
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAY_FILES:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, VOCAB_FILE), "w", encoding="utf-8") as file:
+            json.dump(self.vocab, file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by save(), memory-mapping the postings."""
+        with open(os.path.join(path, VOCAB_FILE), "r", encoding="utf-8") as file:
+            vocab = json.load(file)
+        arrays = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAY_FILES]
+        return cls(vocab, *arrays)
+
+    def term_contribution(self, term_id):
+        """Paragraph IDs containing a term and the BM25 weight the term adds to each."""
+        start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+        docs = self.doc_ids[start:end]
+        tf = self.term_freqs[start:end]
+        norm = K1 * (1 - B + B * self.doc_lens[docs] / self.avg_doc_len)
+        return docs, self.idf[term_id] * tf * (K1 + 1) / (tf + norm)
+
+    def score(self, query):
+        """BM25 score of every paragraph for query, as a dense float32 array."""
+        return self.score_batch([query])[0]
+
+    def score_batch(self, queries):
+        """
+        BM25 scores for several queries as a (queries x paragraphs) array.
+        Each distinct term's postings are read and weighted once for the whole batch.
+        """
+        scores = np.zeros((len(queries), len(self.doc_lens)), dtype=np.float32)
+        if not self.avg_doc_len:
+            return scores
+
+        occurrences = defaultdict(list)  # term -> [(row, count in that query)]
+        for row, query in enumerate(queries):
+            for term, count in Counter(tokenize(query)).items():
+                occurrences[term].append((row, count))
+
+        for term, rows in occurrences.items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            docs, contribution = self.term_contribution(term_id)
+            for row, count in rows:
+                scores[row, docs] += count * contribution
+        return scores
+
+    def top_sections(self, scores, n):
+        """
+        (section ID, score) for the n sections whose best paragraph scores highest,
+        best first; sections with no matching paragraph are skipped.
+        """
+        matched = np.flatnonzero(scores)
+        if not len(matched) or n <= 0:
+            return []
+        section_scores = np.zeros(len(self.paragraph_ptr) - 1, dtype=np.float32)
+        sections = np.searchsorted(self.paragraph_ptr, matched, side="right") - 1
+        np.maximum.at(section_scores, sections, scores[matched])
+
+        candidates = np.flatnonzero(section_scores)
+        top = candidates[np.argsort(-section_scores[candidates], kind="stable")[:n]]
+        return [(int(i), float(section_scores[i])) for i in top]
+
+    def best_paragraphs(self, query, section_ids, scores=None):
+        """
+        For each section ID, the position of its best-scoring paragraph
+        (None for sections without paragraphs).
+        """
+        if scores is None:
+            scores = self.score(query)
+        best = []
+        for section_id in section_ids:
+            start, end = self.paragraph_ptr[section_id], self.paragraph_ptr[section_id + 1]
+            best.append(int(np.argmax(scores[start:end])) if end > start else None)
+        return best
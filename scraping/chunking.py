@@ -0,0 +1,141 @@
+import re
+
+# Scraped sections range from a lone heading to thousands of words, so before indexing
+# they are split or merged into chunks of bounded size. Each chunk keeps the title,
+# heading path and URL of the section it came from. Splits overlap by a few sentences
+# so a passage cut at a chunk boundary is still found whole in one of them.
+CHUNK_MAX_TOKENS = 256
+CHUNK_OVERLAP_TOKENS = 32
+CHUNK_MIN_TOKENS = 24
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+def count_tokens(text):
+    """Approximate token count (words and punctuation marks), no tokenizer needed."""
+    return len(TOKEN_RE.findall(text))
+
+def chunk_tokens(chunk):
+    """Approximate tokens of a section or chunk: title, paragraphs and code."""
+    return count_tokens(chunk["title"]) + sum(count_tokens(text) for text in chunk["content"] + chunk["code"])
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_RE.split(text.strip()) if sentence]
+
+def split_words(text, max_tokens):
+    """
+    Cut text between words into pieces of at most max_tokens. Words can be many tokens
+    each (e.g. "foo.bar(baz),"), so pieces are filled by counting tokens, not words,
+    and a word over the budget on its own is cut between its tokens.
+    """
+    pieces, current, used = [], [], 0
+    for word in text.split():
+        parts = TOKEN_RE.findall(word)
+        for start in range(0, len(parts), max_tokens):
+            piece = "".join(parts[start:start + max_tokens]) if len(parts) > max_tokens else word
+            tokens = min(len(parts), max_tokens)
+            if current and used + tokens > max_tokens:
+                pieces.append(" ".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def split_paragraph(paragraph, max_tokens):
+    """Split a paragraph into pieces of at most max_tokens, at sentence boundaries where possible."""
+    pieces, current, used = [], [], 0
+    for sentence in split_sentences(paragraph):
+        # Run-on "sentences" (e.g. long lists) are cut between words
+        atoms = [sentence] if count_tokens(sentence) <= max_tokens else split_words(sentence, max_tokens)
+        for atom in atoms:
+            tokens = count_tokens(atom)
+            if current and used + tokens > max_tokens:
+                pieces.append(" ".join(current))
+                current, used = [], 0
+            current.append(atom)
+            used += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def overlap_text(paragraph, overlap_tokens):
+    """The trailing sentences of paragraph that fit in overlap_tokens."""
+    tail, used = [], 0
+    for sentence in reversed(split_sentences(paragraph)):
+        used += count_tokens(sentence)
+        if used > overlap_tokens:
+            break
+        tail.insert(0, sentence)
+    return " ".join(tail)
+
+def new_chunk(section):
+    return {
+        "title": section["title"],
+        "headings": section.get("headings") or [section["title"]],
+        "content": [],
+        "code": [],
+        "url": section["url"],
+    }
+
+def chunk_section(section, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Split one section into chunks of at most about max_tokens. Paragraphs are packed in order
+    and split at sentence boundaries when too long; code blocks are never split.
+    """
+    budget = max(max_tokens - count_tokens(section["title"]), 2 * overlap_tokens + 2)
+    units = []  # (field, text, tokens)
+    for paragraph in section["content"]:
+        for piece in split_paragraph(paragraph, budget - overlap_tokens):
+            units.append(("content", piece, count_tokens(piece)))
+    for code in section["code"]:
+        units.append(("code", code, count_tokens(code)))
+
+    chunks = [new_chunk(section)]
+    used = 0
+    for field, text, tokens in units:
+        current = chunks[-1]
+        if used and used + tokens > budget:
+            previous = current
+            current = new_chunk(section)
+            chunks.append(current)
+            used = 0
+            if field == "content" and previous["content"]:
+                overlap = overlap_text(previous["content"][-1], overlap_tokens)
+                if overlap:
+                    current["content"].append(overlap)
+                    used = count_tokens(overlap)
+        current[field].append(text)
+        used += tokens
+    return chunks
+
+def merge_chunks(first, second):
+    """Fold the smaller of two neighbouring chunks into the larger; its heading becomes a paragraph."""
+    if chunk_tokens(first) >= chunk_tokens(second):
+        first["content"] += [second["title"]] + second["content"]
+        first["code"] += second["code"]
+        return first
+    second["content"] = [first["title"]] + first["content"] + second["content"]
+    second["code"] = first["code"] + second["code"]
+    return second
+
+def chunk_sections(sections, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS, min_tokens=CHUNK_MIN_TOKENS):
+    """
+    Stream sections into bounded chunks: large sections are split by chunk_section, and
+    chunks under min_tokens are merged into a neighbour from the same page when the
+    result still fits in max_tokens.
+    """
+    pending = None  # held back so a following tiny chunk can be merged into it
+    for section in sections:
+        for chunk in chunk_section(section, max_tokens, overlap_tokens):
+            if pending is not None and pending["url"] == chunk["url"] \
+                    and min(chunk_tokens(pending), chunk_tokens(chunk)) < min_tokens \
+                    and chunk_tokens(pending) + chunk_tokens(chunk) <= max_tokens:
+                pending = merge_chunks(pending, chunk)
+                continue
+            if pending is not None:
+                yield pending
+            pending = chunk
+    if pending is not None:
+        yield pending
@@ -0,0 +1,70 @@
+import re
+from scraping.chunking import count_tokens, split_sentences
+
+# Search results are rendered into the LLM prompt as plain text blocks instead of the
+# repr of the result dicts, filled in rank order until the token budget is spent.
+# Prompt evaluation time in Ollama grows with every token, so the budget is kept modest.
+CONTEXT_TOKEN_BUDGET = 1200
+
+def code_key(code):
+    """Whitespace-insensitive identity of a code block, for deduplication."""
+    return re.sub(r"\s+", " ", code).strip()
+
+def truncate_sentences(text, max_tokens):
+    """The leading sentences of text that fit in max_tokens ("" if not even one does)."""
+    kept, used = [], 0
+    for sentence in split_sentences(text):
+        used += count_tokens(sentence)
+        if used > max_tokens:
+            break
+        kept.append(sentence)
+    return " ".join(kept)
+
+def render_header(result):
+    """'[library] Page > Section (url)' line introducing a result."""
+    path = " > ".join(result.get("headings") or [result["title"]])
+    library = f"[{result['library']}] " if result.get("library") else ""
+    return f"{library}{path} ({result['url']})"
+
+def build_context(results, token_budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Render search results as compact prompt context within token_budget (approximate tokens).
+    Results are added in rank order; a paragraph that does not fit is cut at a sentence
+    boundary, code blocks are added whole or not at all, and code already shown for a
+    higher-ranked result is not repeated.
+    """
+    blocks = []
+    remaining = token_budget
+    seen_code = set()
+
+    for result in results:
+        header = render_header(result)
+        cost = count_tokens(header)
+        if cost > remaining:
+            break
+        lines = [header]
+        remaining -= cost
+
+        paragraph = result.get("best_paragraph")
+        if paragraph and remaining > 0:
+            if count_tokens(paragraph) > remaining:
+                paragraph = truncate_sentences(paragraph, remaining)
+            if paragraph:
+                lines.append(paragraph)
+                remaining -= count_tokens(paragraph)
+
+        for code in result.get("code", []):
+            key = code_key(code)
+            if not key or key in seen_code:
+                continue
+            block = f"```\n{code.strip()}\n```"
+            cost = count_tokens(block)
+            if cost > remaining:
+                continue  # a smaller block further down may still fit
+            seen_code.add(key)
+            lines.append(block)
+            remaining -= cost
+
+        blocks.append("\n".join(lines))
+
+    return "\n\n".join(blocks)
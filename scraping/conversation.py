@@ -0,0 +1,59 @@
+from scraping.chunking import count_tokens
+
+# Multi-turn chat state. Every prompt is the fixed system prompt, then the earlier turns
+# exactly as they were sent, then the new question with its retrieved context. Earlier
+# turns are never rewritten, so each prompt starts with the previous prompt and answer,
+# and Ollama only has to evaluate the new turn instead of the whole conversation.
+SYSTEM_PROMPT = (
+    "You are Alexandria, a coding assistant for the libraries used in the user's project. "
+    "Each question comes with excerpts from the libraries' documentation. "
+    "Answer from those excerpts and the conversation so far, say so when they do not cover "
+    "the question, and keep answers short, with code where it helps."
+)
+
+# Approximate tokens of earlier turns kept in the prompt
+HISTORY_TOKEN_BUDGET = 4096
+
+def user_message(question, context=""):
+    """A user turn: the retrieved documentation first, then the question."""
+    if not context:
+        return f"Question: {question}"
+    return f"Documentation:\n{context}\n\nQuestion: {question}"
+
+class Conversation:
+    """System prompt plus a token-bounded history of (user message, answer) turns."""
+
+    def __init__(self, system_prompt=SYSTEM_PROMPT, history_tokens=HISTORY_TOKEN_BUDGET):
+        self.system_prompt = system_prompt
+        self.history_tokens = history_tokens
+        self.turns = []  # (user message, assistant answer)
+
+    def history_size(self):
+        return sum(count_tokens(user) + count_tokens(answer) for user, answer in self.turns)
+
+    def trim(self):
+        """
+        Once the history is over budget, drop the oldest turns until it is down to half
+        the budget. Dropping turns changes the prompt prefix, so doing it in one go only
+        costs a full prompt evaluation every few turns instead of on every turn.
+        """
+        if self.history_size() <= self.history_tokens:
+            return
+        while self.turns and self.history_size() > self.history_tokens // 2:
+            self.turns.pop(0)
+
+    def messages(self, user_content):
+        """Chat messages for a new turn: system prompt, kept history, then user_content."""
+        self.trim()
+        messages = [{"role": "system", "content": self.system_prompt}]
+        for user, answer in self.turns:
+            messages.append({"role": "user", "content": user})
+            messages.append({"role": "assistant", "content": answer})
+        messages.append({"role": "user", "content": user_content})
+        return messages
+
+    def add_turn(self, user_content, answer):
+        self.turns.append((user_content, answer))
+
+    def clear(self):
+        self.turns = []
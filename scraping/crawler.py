@@ -0,0 +1,124 @@
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Documentation crawls spend nearly all their time waiting on the network, so pages are
+# fetched by a pool of threads. The crawl is still breadth-first: a whole depth level is
+# fetched concurrently before the next one starts, so every page keeps the depth and
+# parent it would have had in a one-page-at-a-time crawl. Each host gets at most
+# HOST_CONCURRENCY requests in flight and HOST_REQUESTS_PER_SECOND request starts.
+CRAWL_WORKERS = 16
+HOST_CONCURRENCY = 4
+HOST_REQUESTS_PER_SECOND = 10.0
+
+class HostLimiter:
+    """Per-host cap on requests in flight and on the rate requests are started."""
+
+    def __init__(self, concurrency=HOST_CONCURRENCY, requests_per_second=HOST_REQUESTS_PER_SECOND):
+        self.concurrency = concurrency
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.lock = threading.Lock()
+        self.slots = defaultdict(lambda: threading.BoundedSemaphore(self.concurrency))
+        self.next_start = defaultdict(float)  # host -> earliest time the next request may start
+
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            slot = self.slots[host]
+        slot.acquire()
+        with self.lock:
+            start = max(time.monotonic(), self.next_start[host])
+            self.next_start[host] = start + self.interval
+        delay = start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return host
+
+    def release(self, host):
+        self.slots[host].release()
+
+    def __call__(self, url):
+        return HostSlot(self, url)
+
+class HostSlot:
+    """Context manager holding one of a host's request slots."""
+
+    def __init__(self, limiter, url):
+        self.limiter = limiter
+        self.url = url
+
+    def __enter__(self):
+        self.host = self.limiter.acquire(self.url)
+        return self
+
+    def __exit__(self, *exc):
+        self.limiter.release(self.host)
+        return False
+
+def crawl(start_url, visit, max_depth=3, workers=CRAWL_WORKERS, visit_leaves=False, handle_page=None):
+    """
+    Breadth-first crawl from start_url, calling visit(url, visited) on up to `workers`
+    pages at once. visit returns (links found on the page, page data); visited is the set of
+    pages crawled before the current level and must not be modified. A link is crawled at
+    the depth it is first found at, as a child of the first page (in crawl order) linking to it.
+    handle_page(url, page data) is called on the calling thread, in crawl order, as each
+    page's result comes in. With visit_leaves, the links found one level past max_depth are
+    visited too, but their own links are not followed.
+    Returns (all_links, tree, stats): every link found (including those one level past
+    max_depth), the parent -> children tree of pages up to max_depth, and crawl statistics.
+    """
+    visited = set()
+    tree = defaultdict(list)  # key: parent URL, value: list of child URLs
+    all_links = {start_url}
+    tree[start_url]  # ensure root is present
+    level = [start_url]
+    depth = 0
+    started = time.perf_counter()
+    errors = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while level:
+            visited.update(level)
+            futures = [executor.submit(visit, url, visited) for url in level]
+
+            next_level = []
+            queued = set()
+            for index, url in enumerate(level):
+                try:
+                    links, page = futures[index].result()
+                except Exception as e:
+                    print(f"Error fetching {url}: {e}")
+                    errors += 1
+                    continue
+                finally:
+                    futures[index] = None  # don't hold on to pages already handled
+                if handle_page:
+                    handle_page(url, page)
+                if depth > max_depth:
+                    continue  # leaf pages: their links are not followed
+                for link in sorted(links):
+                    all_links.add(link)
+                    if link in visited or link in queued:
+                        continue
+                    if depth + 1 > max_depth:
+                        if visit_leaves:
+                            queued.add(link)
+                            next_level.append(link)
+                        continue
+                    queued.add(link)
+                    tree[url].append(link)
+                    next_level.append(link)
+
+            level = next_level
+            depth += 1
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "pages": len(visited),
+        "errors": errors,
+        "seconds": elapsed,
+        "pages_per_second": len(visited) / elapsed if elapsed > 0 else 0.0,
+    }
+    return all_links, tree, stats
@@ -0,0 +1,151 @@
+import os
+import re
+import time
+import hashlib
+import numpy as np
+from scraping import models
+
+# Content-addressed embedding cache stored in .alexandria/embedding_cache/<model>/.
+# Vectors are float16 rows in one flat file. index.npz holds three parallel arrays sorted
+# by key: 16-byte text digests, their rows and when each was last used, so loading and
+# saving a cache of hundreds of thousands of texts is a few array reads and writes.
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+EVICT_TO = 0.8  # eviction trims the vectors to this share of max_bytes, so it runs rarely
+EVICT_BLOCK_ROWS = 65536
+VECTORS_FILE = "vectors.f16"
+INDEX_FILE = "index.npz"
+KEY_DTYPE = "S16"
+
+def text_hash(text):
+    """Key for a piece of text, independent of which section or library it came from."""
+    return hashlib.sha256(text.encode("utf-8")).digest()[:16]
+
+class EmbeddingCache:
+    """Persistent (model name, text hash) -> embedding cache with size-based LRU eviction."""
+
+    def __init__(self, cache_dir, model_name, max_bytes=DEFAULT_MAX_BYTES):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+        self.keys = np.zeros(0, dtype=KEY_DTYPE)  # sorted text hashes
+        self.rows = np.zeros(0, dtype=np.int64)  # row of each key in the vectors file
+        self.last_used = np.zeros(0, dtype=np.float64)  # timestamp of each key's last use
+        self.dim = None
+        self.pending = {}  # hash -> vector, not yet written to disk
+        self.touched = False  # last_used changed since the index was saved
+
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            try:
+                with np.load(index_path) as index:
+                    self.dim = int(index["dim"])
+                    self.keys, self.rows, self.last_used = index["keys"], index["rows"], index["last_used"]
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable embedding cache {index_path}: {e}")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _positions(self, hashes):
+        """Position of each hash in self.keys, or -1 where it is not cached."""
+        if not len(self.keys):
+            return np.full(len(hashes), -1)
+        wanted = np.array(hashes, dtype=KEY_DTYPE)
+        positions = np.minimum(np.searchsorted(self.keys, wanted), len(self.keys) - 1)
+        return np.where(self.keys[positions] == wanted, positions, -1)
+
+    def _vectors(self):
+        """Memory-map the stored vectors (None when the cache is empty)."""
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        if self.dim is None or not os.path.exists(vectors_path) or not os.path.getsize(vectors_path):
+            return None
+        return np.memmap(vectors_path, dtype=np.float16, mode="r").reshape(-1, self.dim)
+
+    def get_many(self, hashes):
+        """Return {hash: float32 vector} for the hashes that are cached."""
+        vectors = self._vectors()
+        if vectors is None or not len(self.keys):
+            return {}
+        hashes = list(set(hashes))
+        positions = self._positions(hashes)
+        hit = (positions >= 0) & (self.rows[positions] < len(vectors))
+        if hit.any():
+            self.last_used[positions[hit]] = time.time()
+            self.touched = True
+        return {hashes[i]: np.asarray(vectors[self.rows[positions[i]]], dtype=np.float32) for i in np.flatnonzero(hit)}
+
+    def put_many(self, hashes, vectors):
+        """Queue new embeddings; they are written by save()."""
+        for h, vector in zip(hashes, vectors):
+            self.pending[h] = vector
+
+    def save(self):
+        """Append pending vectors to disk, then evict least recently used rows above max_bytes."""
+        if self.pending:
+            hashes = list(self.pending)
+            new = [h for h, position in zip(hashes, self._positions(hashes)) if position < 0]
+            self.pending = {h: self.pending[h] for h in new}
+        if not self.pending and not self.touched:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+
+        if self.pending:
+            if self.dim is None:
+                self.dim = len(next(iter(self.pending.values())))
+            row_bytes = self.dim * np.dtype(np.float16).itemsize
+            # Rows no key points to (e.g. a cache left by an older version) are dropped
+            appending = len(self.keys) and os.path.exists(vectors_path)
+            first_row = os.path.getsize(vectors_path) // row_bytes if appending else 0
+            with open(vectors_path, "ab" if appending else "wb") as file:
+                file.write(np.asarray(list(self.pending.values()), dtype=np.float16).tobytes())
+            keys = np.concatenate([self.keys, np.array(list(self.pending), dtype=KEY_DTYPE)])
+            rows = np.concatenate([self.rows, np.arange(first_row, first_row + len(self.pending), dtype=np.int64)])
+            last_used = np.concatenate([self.last_used, np.full(len(self.pending), time.time())])
+            order = np.argsort(keys, kind="stable")
+            self.keys, self.rows, self.last_used = keys[order], rows[order], last_used[order]
+            self.pending = {}
+
+        row_bytes = self.dim * np.dtype(np.float16).itemsize
+        if os.path.getsize(vectors_path) > self.max_bytes:
+            self._evict(vectors_path, int(self.max_bytes * EVICT_TO) // row_bytes)
+
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(index_path + ".tmp", "wb") as file:
+            np.savez(file, dim=self.dim, keys=self.keys, rows=self.rows, last_used=self.last_used)
+        os.replace(index_path + ".tmp", index_path)
+        self.touched = False
+
+    def _evict(self, vectors_path, max_rows):
+        """Rewrite the vectors file keeping only the max_rows most recently used entries."""
+        keep = np.sort(np.argsort(-self.last_used, kind="stable")[:max_rows])  # positions, still sorted by key
+        old_vectors = self._vectors()
+        with open(vectors_path + ".tmp", "wb") as file:
+            for start in range(0, len(keep), EVICT_BLOCK_ROWS):  # bounded memory however large the cache
+                file.write(np.ascontiguousarray(old_vectors[self.rows[keep[start:start + EVICT_BLOCK_ROWS]]]).tobytes())
+        os.replace(vectors_path + ".tmp", vectors_path)
+        self.keys, self.rows, self.last_used = self.keys[keep], np.arange(len(keep), dtype=np.int64), self.last_used[keep]
+
+def cached_encode(model_name, texts, cache=None):
+    """
+    Encode texts with the named model, only running the encoder on texts
+    that are neither in the cache nor repeated earlier in the batch.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    if cache is None:
+        return np.asarray(models.get_model(model_name).encode(texts), dtype=np.float32)
+
+    hashes = [text_hash(text) for text in texts]
+    found = cache.get_many(hashes)
+
+    missing = {}
+    for h, text in zip(hashes, texts):
+        if h not in found and h not in missing:
+            missing[h] = text
+    if missing:
+        encoded = models.get_model(model_name).encode(list(missing.values()))
+        cache.put_many(missing.keys(), encoded)
+        found.update((h, np.asarray(vector, dtype=np.float32)) for h, vector in zip(missing.keys(), encoded))
+
+    return np.array([found[h] for h in hashes], dtype=np.float32)
@@ -0,0 +1,147 @@
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional; BeautifulSoup's html.parser is always available
+    etree = None
+
+# Pages are parsed into the links on them and their structured sections by one of two
+# backends producing the same output. "html.parser" builds a BeautifulSoup tree with
+# Python's html.parser and walks it several times. "lxml" parses with libxml2 and
+# collects links, page text and sections in a single walk over the tree, following
+# BeautifulSoup's rules for which text counts. It is used whenever lxml is installed.
+# libxml2 turns CRLF and lone CR line endings into LF, as browsers do, while html.parser
+# keeps them, so html.parser pages get the same newline normalization first.
+# Otherwise the two only differ on broken markup that the parsers repair differently
+# (e.g. a <pre> inside an unclosed <p>).
+SECTION_TAGS = ["h1", "h2", "h3", "p", "pre", "code"]
+HEADING_TAGS = ["h1", "h2", "h3"]
+MIN_PAGE_TEXT = 200  # pages with less text than this are not documentation
+
+SKIPPED_TAGS = {"script", "style", "template"}  # text inside is not page text
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+def group_sections(tags, url):
+    """Group (tag name, text) pairs, in document order, into sections headed by h1/h2/h3."""
+    sections = []  # List to hold structured documentation data
+    current_section = None
+    headings = []  # h1 > h2 > h3 path leading to the current section
+
+    # Extract headings and paragraphs, grouping content under headings.
+    for name, text in tags:
+        if not text:
+            continue
+
+        if name in HEADING_TAGS:
+            if current_section:
+                sections.append(current_section)
+            level = int(name[1])
+            headings = headings[:level - 1] + [text]
+            current_section = {"title": text, "headings": headings, "content": [], "code": [], "url": url}
+        elif name == "p" and current_section:
+            current_section["content"].append(text)
+        elif name in ["pre", "code"] and current_section:
+            current_section["code"].append(text)
+
+    if current_section:
+        sections.append(current_section)
+    return sections
+
+def soup_anchors(soup):
+    """(href, anchor text) of every link in a BeautifulSoup tree."""
+    return [(a_tag["href"], a_tag.get_text()) for a_tag in soup.find_all("a", href=True)]
+
+def extract_sections(soup, url):
+    """Structured sections of a BeautifulSoup tree, or None if it has too little text to be documentation."""
+    # Remove scripts and styles
+    for script in soup(["script", "style"]):
+        script.extract()
+
+    # Simple content analysis: if the page doesn't have enough text, skip it.
+    full_text = soup.get_text(separator=" ", strip=True)
+    if len(full_text) < MIN_PAGE_TEXT:
+        return None
+
+    return group_sections(((tag.name, tag.get_text().strip()) for tag in soup.find_all(SECTION_TAGS)), url)
+
+def normalize_newlines(html):
+    """CRLF and lone CR line endings as LF, like the HTML spec's input preprocessing."""
+    return html.replace("\r\n", "\n").replace("\r", "\n")
+
+def parse_html_parser(html, url):
+    """(anchors, sections) of a page, from a BeautifulSoup html.parser tree."""
+    soup = BeautifulSoup(normalize_newlines(html), "html.parser")
+    anchors = soup_anchors(soup)  # before extract_sections strips the page
+    return anchors, extract_sections(soup, url)
+
+def parse_lxml(html, url):
+    """(anchors, sections) of a page, from one walk over an lxml tree."""
+    if not html.strip():
+        return [], None
+    # Parsed as UTF-8 bytes: lxml refuses str input with an encoding declaration
+    root = etree.fromstring(html.encode("utf-8"), etree.HTMLParser(encoding="utf-8"))
+    if root is None:
+        return [], None
+
+    anchors = []    # [href, [text parts]]
+    matched = []    # [tag name, [text parts]] for SECTION_TAGS, in document order
+    collecting = []  # text part lists of the open links and section tags
+    skipped = 0     # open script/style/template elements
+    preserved = 0   # open pre/textarea elements
+    text_length = -1  # length of the page text joined with single spaces
+    stack = []      # what each open element pushed: (collects, skips, preserves)
+
+    def add_text(text):
+        nonlocal text_length
+        if not text or skipped:
+            return
+        # Like BeautifulSoup, whitespace-only strings outside <pre> collapse to one character
+        if not preserved and not text.strip(ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        for parts in collecting:
+            parts.append(text)
+        stripped = text.strip()
+        if stripped:
+            text_length += len(stripped) + 1
+
+    for event, element in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        tag = element.tag
+        if event == "start":
+            collects = None
+            if tag in SECTION_TAGS:
+                collects = []
+                matched.append((tag, collects))
+            elif tag == "a" and element.get("href") is not None:
+                collects = []
+                anchors.append((element.get("href"), collects))
+            if collects is not None:
+                collecting.append(collects)
+            skips, preserves = tag in SKIPPED_TAGS, tag in PRESERVE_WHITESPACE_TAGS
+            skipped += skips
+            preserved += preserves
+            stack.append((collects, skips, preserves))
+            add_text(element.text)
+        elif event == "end":
+            collects, skips, preserves = stack.pop()
+            if collects is not None:
+                collecting.pop()
+            skipped -= skips
+            preserved -= preserves
+            add_text(element.tail)
+        else:  # comments and processing instructions are not text, but what follows them is
+            add_text(element.tail)
+
+    anchors = [(href, "".join(parts)) for href, parts in anchors]
+    if text_length < MIN_PAGE_TEXT:
+        return anchors, None
+    return anchors, group_sections(((tag, "".join(parts).strip()) for tag, parts in matched), url)
+
+PARSERS = {"html.parser": parse_html_parser}
+if etree is not None:
+    PARSERS["lxml"] = parse_lxml
+DEFAULT_PARSER = "lxml" if etree is not None else "html.parser"
+
+def parse_page(html, url, parser=None):
+    """(anchors, sections) of a page: every (href, anchor text), and its sections or None."""
+    return PARSERS[parser or DEFAULT_PARSER](html, url)
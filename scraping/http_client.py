@@ -0,0 +1,106 @@
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+# One HTTP client shared by the documentation crawler and the library doc-URL lookups.
+# Connections are kept alive in a pool per host, so repeated requests to the same site
+# skip the TCP and TLS handshakes. Responses are compressed when the server supports it
+# (brotli through the brotli package, a dependency; without it only gzip and deflate are
+# offered), failed requests are retried with backoff, and no more than
+# MAX_CONCURRENT_REQUESTS requests are in flight at once.
+MAX_CONCURRENT_REQUESTS = 32
+HOST_POOLS = 16            # hosts whose connection pools are kept
+HOST_POOL_SIZE = 8         # connections kept alive per host
+REQUEST_TIMEOUT = 10       # seconds
+RETRIES = 3
+RETRY_BACKOFF = 0.5        # seconds, doubled on every retry
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_client = None
+_lock = threading.Lock()
+
+def counting_pool(pool_cls, connection_cls, on_connect):
+    """pool_cls whose connections call on_connect(host) every time they open a socket."""
+    class CountingConnection(connection_cls):
+        def connect(self):
+            super().connect()
+            on_connect(self.host)
+
+    return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": CountingConnection})
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter reporting every new connection (including reconnects) to on_connect."""
+
+    def __init__(self, on_connect, **kwargs):
+        self.on_connect = on_connect
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": counting_pool(HTTPConnectionPool, HTTPConnection, self.on_connect),
+            "https": counting_pool(HTTPSConnectionPool, HTTPSConnection, self.on_connect),
+        }
+
+class HttpClient:
+    """Pooled, retrying requests session with a global concurrency cap and per-host counters."""
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_REQUESTS, pool_size=HOST_POOL_SIZE, retries=RETRIES,
+                 backoff=RETRY_BACKOFF, timeout=REQUEST_TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=["GET", "HEAD"], raise_on_status=False)
+        adapter = CountingAdapter(self.count_connection, pool_connections=HOST_POOLS, pool_maxsize=pool_size,
+                                  max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.lock = threading.Lock()
+        self.counters = defaultdict(lambda: {"requests": 0, "bytes": 0, "connections": 0})
+
+    def get(self, url, **kwargs):
+        """requests.get through the shared session (default timeout REQUEST_TIMEOUT)."""
+        kwargs.setdefault("timeout", self.timeout)
+        with self.slots:
+            response = self.session.get(url, **kwargs)
+            size = len(response.content)  # read the body before giving the slot back
+
+        wire_bytes = response.raw.tell() if hasattr(response.raw, "tell") else 0
+        with self.lock:
+            counters = self.counters[urlparse(url).hostname]
+            counters["requests"] += 1
+            counters["bytes"] += wire_bytes or size
+        return response
+
+    def count_connection(self, host):
+        with self.lock:
+            self.counters[host]["connections"] += 1
+
+    def stats(self):
+        """Per host: requests sent, bytes received (compressed), connections opened and connection reuse ratio."""
+        with self.lock:
+            stats = {}
+            for host, counters in self.counters.items():
+                requests_sent, connections = counters["requests"], counters["connections"]
+                stats[host] = dict(counters, reuse_ratio=max(0.0, 1 - connections / requests_sent) if requests_sent else 0.0)
+            return stats
+
+    def close(self):
+        self.session.close()
+
+def get_http_client():
+    """The shared HttpClient, created on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,198 @@
+import os
+import json
+import glob
+import hashlib
+import faiss
+import numpy as np
+from scraping.bm25_index import BM25Index
+from scraping.section_store import SECTIONS_FILE, SectionStore
+
+# Each library gets its own index shard in .alexandria/vectordb/<library>/index/,
+# holding these artifacts, written at scan time
+SHARD_INDEX_DIR = "index"
+CHUNKS_FILE = "chunks.jsonl"
+TITLE_INDEX_FILE = "title.index"
+CODE_INDEX_FILE = "code.index"
+BM25_DIR = "bm25"
+CODE_IDS_FILE = "code_ids.npy"
+CENTROID_FILE = "centroid.npy"
+INDEX_META_FILE = "index_meta.json"
+MANIFEST_FILE = "manifest.json"
+TITLE_EMBEDDINGS_FILE = "title_embeddings.npy"
+CODE_EMBEDDINGS_FILE = "code_embeddings.npy"
+
+# Stored embeddings are only read back to skip re-encoding, so float16 is plenty
+EMBEDDING_DTYPE = np.float16
+
+# FAISS indexes are memory-mapped when loaded, so chat sessions share the page cache
+# instead of each holding a copy. IO_FLAG_MMAP only maps the inverted lists of IVF
+# indexes; IO_FLAG_MMAP_IFC (faiss 1.11+) also maps the vectors of flat, scalar-quantizer
+# and HNSW indexes. An HNSW graph is still read into RAM either way.
+FAISS_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+def find_doc_files(directory):
+    """Return every section store (sections.jsonl) under directory, in a stable order."""
+    return sorted(glob.glob(os.path.join(directory, "**", SECTIONS_FILE), recursive=True))
+
+def docs_fingerprint(directory, doc_files=None):
+    """Fingerprint the scraped docs (all of them, or just doc_files) so stale indexes can be detected without reading them."""
+    fingerprint = {}
+    for json_file in find_doc_files(directory) if doc_files is None else doc_files:
+        stat = os.stat(json_file)
+        fingerprint[os.path.relpath(json_file, directory)] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+def file_hash(path):
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def section_hash(section):
+    """Hash of the parts of a section that feed the embeddings and BM25."""
+    payload = json.dumps([section["title"], section["content"], section["code"]], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_manifest(vectordb_path):
+    """Load the content-hash manifest written by the last index build, or an empty one."""
+    manifest_path = os.path.join(vectordb_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {"libraries": {}}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable manifest {manifest_path}: {e}")
+        return {"libraries": {}}
+
+def index_version(manifest):
+    """
+    Short hash of what a shard was built from (docs content, models and index options).
+    Unlike the fingerprint it survives rescans that leave the docs unchanged.
+    """
+    payload = {key: value for key, value in manifest.items() if key not in ("libraries", "code_ids")}
+    payload["docs"] = {relpath: entry["hash"] for relpath, entry in manifest["libraries"].items()}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def load_previous_embeddings(vectordb_path, manifest):
+    """
+    Map each section hash from the last build to its (title vector, code vector or None),
+    so unchanged sections can skip the encoders.
+    """
+    title_path = os.path.join(vectordb_path, TITLE_EMBEDDINGS_FILE)
+    code_path = os.path.join(vectordb_path, CODE_EMBEDDINGS_FILE)
+    if not manifest["libraries"] or not os.path.exists(title_path):
+        return {}
+
+    hashes = [h for entry in manifest["libraries"].values() for h in entry["sections"]]
+    title_embeddings = np.load(title_path, mmap_mode="r")
+    code_embeddings = np.load(code_path, mmap_mode="r") if os.path.exists(code_path) else None
+    if len(hashes) != len(title_embeddings):
+        return {}
+
+    code_rows = {section_id: row for row, section_id in enumerate(manifest.get("code_ids", []))}
+    previous = {}
+    for section_id, h in enumerate(hashes):
+        code_row = code_rows.get(section_id)
+        code_vector = code_embeddings[code_row] if code_embeddings is not None and code_row is not None else None
+        previous[h] = (title_embeddings[section_id], code_vector)
+    return previous
+
+def save_embeddings(vectordb_path, manifest, title_embeddings, code_embeddings):
+    """Persist the raw embeddings alongside the manifest describing which section each row belongs to."""
+    os.makedirs(vectordb_path, exist_ok=True)
+    np.save(os.path.join(vectordb_path, TITLE_EMBEDDINGS_FILE), title_embeddings.astype(EMBEDDING_DTYPE))
+
+    code_path = os.path.join(vectordb_path, CODE_EMBEDDINGS_FILE)
+    if code_embeddings is not None:
+        np.save(code_path, code_embeddings.astype(EMBEDDING_DTYPE))
+    elif os.path.exists(code_path):
+        os.remove(code_path)
+
+    with open(os.path.join(vectordb_path, MANIFEST_FILE), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=4)
+
+def save_index_meta(vectordb_path, fingerprint, empty=False):
+    """Record which docs the saved indexes were built from (empty: they had no sections, so there are no indexes)."""
+    meta = {"docs": fingerprint, "empty": True} if empty else {"docs": fingerprint}
+    with open(os.path.join(vectordb_path, INDEX_META_FILE), "w", encoding="utf-8") as file:
+        json.dump(meta, file, indent=4)
+
+def is_empty_shard(vectordb_path, fingerprint):
+    """Whether these docs were already indexed and found to have no sections."""
+    try:
+        with open(os.path.join(vectordb_path, INDEX_META_FILE), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return False
+    return meta.get("empty", False) and meta.get("docs") == fingerprint
+
+def write_faiss_index(index, path):
+    """Write an index to a temporary file then swap it in; sessions mapping the old file keep a valid copy."""
+    faiss.write_index(index, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+def read_faiss_index(path):
+    """Read an index memory-mapped, falling back to a plain read for types the flag cannot map."""
+    try:
+        return faiss.read_index(path, FAISS_MMAP_FLAG)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+def save_indexes(vectordb_path, title_index, bm25, code_index, code_ids, centroid, fingerprint):
+    """Persist the title/code FAISS indexes, BM25 inverted index, code-row -> section ID array and title centroid."""
+    os.makedirs(vectordb_path, exist_ok=True)
+
+    write_faiss_index(title_index, os.path.join(vectordb_path, TITLE_INDEX_FILE))
+
+    code_index_path = os.path.join(vectordb_path, CODE_INDEX_FILE)
+    if code_index is not None:
+        write_faiss_index(code_index, code_index_path)
+    elif os.path.exists(code_index_path):
+        os.remove(code_index_path)
+
+    bm25.save(os.path.join(vectordb_path, BM25_DIR))
+
+    np.save(os.path.join(vectordb_path, CODE_IDS_FILE), np.array(code_ids, dtype=np.int64))
+    np.save(os.path.join(vectordb_path, CENTROID_FILE), centroid)
+
+    # Written last so a half-finished save is never mistaken for a valid index
+    save_index_meta(vectordb_path, fingerprint)
+
+def load_indexes(vectordb_path, store_path, fingerprint):
+    """
+    Load the persisted indexes, the chunk store they were built from (for random access
+    by chunk ID), the code-row -> chunk ID array and the title centroid.
+    Everything but the centroid (and an HNSW graph) is memory-mapped, so several sessions
+    share the same pages.
+    Returns None when they are missing or were built from different docs.
+    """
+    meta_path = os.path.join(vectordb_path, INDEX_META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        if meta.get("docs") != fingerprint:
+            return None
+
+        title_index = read_faiss_index(os.path.join(vectordb_path, TITLE_INDEX_FILE))
+
+        code_index = None
+        code_index_path = os.path.join(vectordb_path, CODE_INDEX_FILE)
+        if os.path.exists(code_index_path):
+            code_index = read_faiss_index(code_index_path)
+
+        bm25 = BM25Index.load(os.path.join(vectordb_path, BM25_DIR))
+
+        sections = SectionStore(store_path)
+        code_ids = np.load(os.path.join(vectordb_path, CODE_IDS_FILE), mmap_mode="r")
+        centroid = np.load(os.path.join(vectordb_path, CENTROID_FILE))
+    except Exception as e:
+        print(f"⚠️ Could not load search indexes from {vectordb_path}: {e}")
+        return None
+
+    return title_index, bm25, code_index, sections, code_ids, centroid
@@ -0,0 +1,71 @@
+import threading
+
+# Shared model registry: every model is loaded once, on first use, and reused by
+# indexing, query processing and search. Importing this module loads nothing.
+TEXT_MODEL_NAME = "all-MiniLM-L6-v2"
+CODE_MODEL_NAME = "microsoft/codebert-base"
+
+# Chat model served by Ollama, and how long Ollama keeps it loaded after each request
+# (a duration such as "30m", or seconds; negative keeps it loaded until Ollama stops)
+LLM_MODEL_NAME = "llama3.2"
+LLM_KEEP_ALIVE = "30m"
+
+# Context window requested from Ollama; large enough for the system prompt, the chat history
+# and a question with its documentation. Every request passes the same value, since
+# changing it makes Ollama reload the model.
+LLM_OPTIONS = {"num_ctx": 8192}
+
+_models = {}
+_stop_words = None
+_llm_client = None
+# One lock per resource, so a multi-second model load never blocks the others
+_lock = threading.Lock()  # guards _model_locks
+_model_locks = {}  # model name -> lock held while that model loads
+_stop_words_lock = threading.Lock()
+_llm_client_lock = threading.Lock()
+
+def get_model(name):
+    """Return the SentenceTransformer called name, loading it the first time it is asked for."""
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _lock:
+        model_lock = _model_locks.setdefault(name, threading.Lock())
+    with model_lock:
+        if name not in _models:
+            from sentence_transformers import SentenceTransformer
+            _models[name] = SentenceTransformer(name)
+        return _models[name]
+
+def get_text_model():
+    """MiniLM model used for titles and queries."""
+    return get_model(TEXT_MODEL_NAME)
+
+def get_code_model():
+    """CodeBERT model used for code blocks."""
+    return get_model(CODE_MODEL_NAME)
+
+def get_stop_words():
+    """English stopwords from NLTK (needs nltk.download("stopwords") once)."""
+    global _stop_words
+    with _stop_words_lock:
+        if _stop_words is None:
+            from nltk.corpus import stopwords
+            _stop_words = set(stopwords.words("english"))
+        return _stop_words
+
+def get_llm_client():
+    """Ollama client shared by every chat turn, so its HTTP connection is reused."""
+    global _llm_client
+    with _llm_client_lock:
+        if _llm_client is None:
+            import ollama
+            _llm_client = ollama.Client()
+        return _llm_client
+
+def parse_keep_alive(value):
+    """Ollama keep_alive from a CLI string: plain numbers are seconds, anything else a duration like "30m"."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
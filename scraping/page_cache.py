@@ -0,0 +1,61 @@
+import os
+import json
+from scraping.section_store import SECTIONS_FILE, SectionStore
+
+# Conditional-request cache for rescans, kept next to each library's sections.jsonl.
+# For every page it remembers the ETag / Last-Modified validators the server sent, the
+# links found on the page, and which rows of sections.jsonl hold the page's sections.
+# A rescan sends the validators back; on a 304 the page's links and sections are taken
+# from the previous scrape, so it is neither downloaded nor parsed again, and its
+# sections are unchanged, so their embeddings are reused when the indexes are updated.
+PAGE_CACHE_FILE = "http_cache.json"
+
+class PageCache:
+    """Per-URL validators, links and section rows from a library's previous scrape."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, PAGE_CACHE_FILE)
+        self.store_path = os.path.join(directory, SECTIONS_FILE)
+        self.pages = {}      # url -> {"etag", "last_modified", "links", "first", "count"} from the last scrape
+        self.new_pages = {}  # the same, for the scrape in progress
+        self.store = None
+
+        if not (os.path.exists(self.path) and os.path.exists(self.store_path)):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                cache = json.load(file)
+            # The rows only make sense for the sections.jsonl the cache was written with
+            if cache["store_size"] == os.path.getsize(self.store_path):
+                self.pages = cache["pages"]
+                self.store = SectionStore(self.store_path)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable page cache {self.path}: {e}")
+
+    def headers(self, url):
+        """If-None-Match / If-Modified-Since headers for a page fetched before."""
+        page = self.pages.get(url)
+        headers = {}
+        if page and page.get("etag"):
+            headers["If-None-Match"] = page["etag"]
+        if page and page.get("last_modified"):
+            headers["If-Modified-Since"] = page["last_modified"]
+        return headers
+
+    def cached(self, url):
+        """(links, sections) of a page from the previous scrape."""
+        page = self.pages[url]
+        sections = [self.store[row] for row in range(page["first"], page["first"] + page["count"])]
+        return set(page["links"]), sections
+
+    def record(self, url, validators, links, first, count):
+        """Remember a page of this scrape: its validators, links and rows [first, first + count)."""
+        if validators.get("etag") or validators.get("last_modified"):
+            self.new_pages[url] = dict(validators, links=sorted(links), first=first, count=count)
+
+    def save(self):
+        """Replace the cache with this scrape's pages; call once sections.jsonl is written."""
+        cache = {"store_size": os.path.getsize(self.store_path), "pages": self.new_pages}
+        with open(self.path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(cache, file, ensure_ascii=False)
+        os.replace(self.path + ".tmp", self.path)
@@ -1,28 +1,47 @@
 import string
-from nltk.corpus import stopwords
-from sentence_transformers import SentenceTransformer
+from functools import lru_cache
+from scraping import models
 
 # !MPORTANT: NEEDS TO RUN nltk.download("stopwords")
 
-# Load stopwords once
-stop_words = set(stopwords.words("english"))
-text_model = SentenceTransformer("all-MiniLM-L6-v2") 
+# Number of recent query embeddings kept in memory
+QUERY_CACHE_SIZE = 256
 
-def preprocess_query(query):
-    """Cleans and tokenizes a user query for better vector search."""
+def normalize_query(query):
+    """Lowercases a query and strips punctuation and stopwords."""
     # Step 1: Normalize text (lowercase, remove punctuation)
     query = query.lower().strip()
     query = query.translate(str.maketrans("", "", string.punctuation))  # Remove punctuation
 
     # Step 2: Remove stopwords & tokenize
     tokens = query.split()
+    stop_words = models.get_stop_words()
     filtered_tokens = [word for word in tokens if word not in stop_words]
     
     # Step 3: Rejoin tokens for FAISS-friendly search
-    clean_query = " ".join(filtered_tokens)
+    return " ".join(filtered_tokens)
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def encode_query(clean_query, model_name=models.TEXT_MODEL_NAME):
+    """Embeds a normalized query, caching the result so repeated questions skip the encoder."""
+    query_embedding = models.get_model(model_name).encode([clean_query])
+    query_embedding.flags.writeable = False  # Shared between callers through the cache
+    return query_embedding
+
+def encode_queries(clean_queries, model_name=models.TEXT_MODEL_NAME):
+    """Embeds many normalized queries in one batched forward pass."""
+    return models.get_model(model_name).encode(list(clean_queries))
+
+def cache_query(query):
+    """A question as the answer cache compares it: lowercased and whitespace collapsed, every word kept."""
+    return " ".join(query.lower().split())
+
+def preprocess_query(query):
+    """Cleans and tokenizes a user query for better vector search."""
+    clean_query = normalize_query(query)
 
     # Step 4: Generate an embedding for FAISS search
-    query_embedding = text_model.encode([clean_query])  # Convert to embedding
+    query_embedding = encode_query(clean_query)  # Convert to embedding
 
     return clean_query, query_embedding
 
@@ -1,21 +1,23 @@
 import os
-import requests
-from bs4 import BeautifulSoup
 import json
 from urllib.parse import urljoin, urlparse, urldefrag
-from collections import deque, defaultdict
 from tqdm import tqdm
+from scraping.http_client import get_http_client
+from scraping.crawler import CRAWL_WORKERS, HostLimiter, crawl
+from scraping.html_parser import parse_page, soup_anchors
+from scraping.page_cache import PageCache
+from scraping.section_store import LEGACY_DOCS_FILE, SectionWriter
 
 # Strategy 1: Heuristic-Based Filtering: inclusion and exclusion keywords.
 INCLUSION_KEYWORDS = ['doc', 'guide', 'api', 'reference', 'tutorial']
 EXCLUSION_KEYWORDS = ['contribute', 'sponsor', 'changelog', 'issues', 'download']
 
-def get_valid_links(soup, base_url, visited):
-    """Extract and normalize valid documentation links from a page using heuristics."""
+def filter_links(anchors, base_url, visited):
+    """Normalize a page's (href, anchor text) pairs and keep the valid documentation links using heuristics."""
     valid_links = set()
-    for a_tag in soup.find_all("a", href=True):
-        anchor_text = a_tag.get_text().strip().lower()
-        href = a_tag["href"].strip()
+    for href, anchor_text in anchors:
+        anchor_text = anchor_text.strip().lower()
+        href = href.strip()
         full_url = urljoin(base_url, href)
         full_url, _ = urldefrag(full_url)  # Remove fragment identifiers
         parsed_url = urlparse(full_url)
@@ -33,87 +35,58 @@ def get_valid_links(soup, base_url, visited):
                 valid_links.add(full_url)
     return valid_links
 
-def fetch_all_links(start_url, name, max_depth=3):
+def get_valid_links(soup, base_url, visited):
+    """Extract and normalize valid documentation links from a BeautifulSoup page using heuristics."""
+    return filter_links(soup_anchors(soup), base_url, visited)
+
+def fetch_page(url, limiter, parser=None):
+    """Download a page (within the host's limits) and parse it into (anchors, sections)."""
+    with limiter(url):
+        response = get_http_client().get(url)
+    return parse_page(response.text, url, parser)
+
+def print_host_stats(url):
+    """Print the shared HTTP client's counters for url's host."""
+    host = urlparse(url).hostname
+    counters = get_http_client().stats().get(host)
+    if counters:
+        print(f"🌐 {host}: {counters['requests']} requests, {counters['bytes'] / 1e6:.1f} MB, "
+              f"{counters['connections']} connections ({counters['reuse_ratio']:.0%} reused)")
+
+def fetch_all_links(start_url, name, max_depth=3, workers=CRAWL_WORKERS, limiter=None, parser=None):
     """
-    Crawl documentation pages starting at start_url.
+    Crawl documentation pages starting at start_url, fetching several pages at once.
     Build a tree view of the pages and return both the set of URLs and the tree.
     """
-    visited = set()
-    tree = defaultdict(list)  # key: parent URL, value: list of child URLs
-    queue = deque([(start_url, None, 0)])  # (current URL, parent URL, current depth)
-    all_links = set([start_url])
-    
+    limiter = limiter or HostLimiter()
+
+    def visit(url, visited):
+        anchors, _ = fetch_page(url, limiter, parser)
+        return filter_links(anchors, url, visited), None
+
     print(f"Indexing {name}")
-    
-    while queue:
-        url, parent, depth = queue.popleft()
-        if url in visited or depth > max_depth:
-            continue
-        visited.add(url)
-        
-        # Build tree: assign as child to its parent if available.
-        if parent:
-            tree[parent].append(url)
-        else:
-            tree[url]  # ensure root is present
-
-        try:
-            response = requests.get(url, timeout=10)
-            soup = BeautifulSoup(response.text, "html.parser")
-            new_links = get_valid_links(soup, url, visited)
-            for link in new_links:
-                all_links.add(link)
-                queue.append((link, url, depth + 1))
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
-            continue
+    all_links, tree, stats = crawl(start_url, visit, max_depth, workers)
+    print(f"Crawled {stats['pages']} pages in {stats['seconds']:.1f}s ({stats['pages_per_second']:.1f} pages/s)")
 
     return all_links, tree
 
-# Strategy 2: Simple Content Analysis: check page content length.
-def scrape_webpage(url):
+def scrape_webpage(url, parser=None):
     """Scrape content from a single webpage and return structured sections."""
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = get_http_client().get(url)
     except Exception as e:
         print(f"Error retrieving {url}: {e}")
         return None
-
-    # Remove scripts and styles
-    for script in soup(["script", "style"]):
-        script.extract()
-
-    # Simple content analysis: if the page doesn't have enough text, skip it.
-    full_text = soup.get_text(separator=" ", strip=True)
-    if len(full_text) < 200:
-        return None
-
-    sections = []  # List to hold structured documentation data
-    current_section = None
-
-    # Extract headings and paragraphs, grouping content under headings.
-    for tag in soup.find_all(["h1", "h2", "h3", "p", "pre", "code"]):
-        text = tag.get_text().strip()
-        if not text:
-            continue
-
-        if tag.name in ["h1", "h2", "h3"]:
-            if current_section:
-                sections.append(current_section)
-            current_section = {"title": text, "content": [], "code": [], "url": url}
-        elif tag.name == "p" and current_section:
-            current_section["content"].append(text)
-        elif tag.name in ["pre", "code"] and current_section:
-            current_section["code"].append(text)
-
-    if current_section:
-        sections.append(current_section)
-    
+    _, sections = parse_page(response.text, url, parser)
     return sections
 
-def scrape_full_documentation(start_url, library_name, directory):
-    """Crawl all relevant documentation pages, build a tree view, and cache structured data inside .alexandria."""
+def scrape_full_documentation(start_url, library_name, directory, max_depth=3, workers=CRAWL_WORKERS, limiter=None,
+                              parser=None):
+    """
+    Crawl all relevant documentation pages, build a tree view, and cache structured data inside .alexandria.
+    Each page is downloaded and parsed once: its links and its sections come from the same parse tree.
+    Returns the number of sections saved and the tree.
+    """
     
     # Ensure the .alexandria folder exists
     alexandria_path = os.path.join(directory, ".alexandria")
@@ -127,36 +100,71 @@ def scrape_full_documentation(start_url, library_name, directory):
     # Ensure the library-specific cache directory exists
     os.makedirs(vectordb_path, exist_ok=True)
 
-    # Fetch links and scrape documentation
-    all_links, tree = fetch_all_links(start_url, library_name)
+    limiter = limiter or HostLimiter()
+    page_cache = PageCache(vectordb_path)
+    reused = 0
+
+    def visit(url, visited):
+        with limiter(url):
+            response = get_http_client().get(url, headers=page_cache.headers(url))
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        if response.status_code == 304 and url in page_cache.pages:
+            # Unchanged since the last scrape: reuse its links and sections
+            links, sections = page_cache.cached(url)
+            cached = page_cache.pages[url]
+            validators = {key: validators[key] or cached.get(key) for key in validators}
+            return links, {"links": links, "sections": sections, "validators": validators, "reused": True}
+
+        anchors, sections = parse_page(response.text, url, parser)
+        # Visited pages are kept so the cached links are complete (the crawl skips visited pages itself)
+        links = filter_links(anchors, url, set())
+        if response.status_code != 200:
+            validators = {}
+        return links, {"links": links, "sections": sections, "validators": validators}
+
+    print(f"Indexing {library_name}")
+
+    # Stream sections into .alexandria/vectordb/<library>/sections.jsonl page by page as the
+    # crawl goes, so memory use doesn't grow with the size of the documentation. Pages one
+    # level past max_depth are scraped too, as they were when links were collected first.
+    with SectionWriter(vectordb_path) as writer, tqdm(desc="🔎 Scraping Progress", unit="page") as progress:
+        def handle_page(url, page):
+            nonlocal reused
+            first = len(writer)
+            if page["sections"]:
+                writer.write(page["sections"])
+            page_cache.record(url, page["validators"], page["links"], first, len(writer) - first)
+            reused += page.get("reused", False)
+            progress.update()
+
+        all_links, tree, stats = crawl(start_url, visit, max_depth, workers, visit_leaves=True, handle_page=handle_page)
+    num_sections = len(writer)
+    page_cache.save()
     print(f"Total unique documentation pages found: {len(all_links)}")
-
-    all_sections = []
-    
-    for index, url in enumerate(tqdm(all_links, desc="🔎 Scraping Progress", unit="page")):
-        try:
-            sections = scrape_webpage(url)
-            if sections:
-                all_sections.extend(sections)
-        except Exception as e:
-            print(f"\n❌ Failed to scrape {url}: {e}")
-    
-    # Save structured documentation data inside .alexandria/vectordb/
-    structured_docs_path = os.path.join(vectordb_path, "structured_docs.json")
-    with open(structured_docs_path, "w", encoding="utf-8") as file:
-        json.dump(all_sections, file, indent=4, ensure_ascii=False)
+    print(f"Crawled {stats['pages']} pages in {stats['seconds']:.1f}s ({stats['pages_per_second']:.1f} pages/s)")
+    print_host_stats(start_url)
+    if reused:
+        print(f"♻️ {reused} unchanged pages reused from the last scrape")
+
+    # Superseded by the section store
+    legacy_docs_path = os.path.join(vectordb_path, LEGACY_DOCS_FILE)
+    if os.path.exists(legacy_docs_path):
+        os.remove(legacy_docs_path)
     
     # Save the tree view
     doc_tree_path = os.path.join(vectordb_path, "doc_tree.json")
     with open(doc_tree_path, "w", encoding="utf-8") as file:
         json.dump(tree, file, indent=4, ensure_ascii=False)
     
-    print(f"✅ Scraping complete!") 
+    print(f"✅ Scraping complete! {num_sections} sections saved.") 
     
-    return all_sections, tree
+    return num_sections, tree
 
 
 # Example usage:
 if __name__ == "__main__":
     start_url = "https://docs.pycord.dev/en/stable/"
-    sections, tree = scrape_full_documentation(start_url)
\ No newline at end of file
+    num_sections, tree = scrape_full_documentation(start_url, "pycord", os.getcwd())
\ No newline at end of file
@@ -1,80 +1,410 @@
-from sentence_transformers import SentenceTransformer
-from rank_bm25 import BM25Okapi
-import faiss
 import numpy as np
 import os
 import json
-import glob
-
-# Loading Text Models (Lazy Loaded)
-text_model = SentenceTransformer("all-MiniLM-L6-v2") 
-code_model = SentenceTransformer("microsoft/codebert-base")
+import shutil
+import hashlib
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from scraping import index_store
+from scraping import models
+from scraping import query_processing
+from scraping.embedding_cache import EmbeddingCache, cached_encode
+from scraping.ann_index import build_faiss_index
+from scraping.bm25_index import BM25Index
+from scraping.section_store import SectionWriter, iter_sections, migrate_legacy_docs
+from scraping.chunking import CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS, chunk_sections
+from scraping.shards import Shard, ShardRouter, load_workspace_libraries
 
 def load_structured_docs(directory):
-    """Load all structured_docs.json files from the given directory."""
-    all_sections = []
-    for json_file in glob.glob(os.path.join(directory, "**", "structured_docs.json"), recursive=True):
-        with open(json_file, "r", encoding="utf-8") as file:
-            sections = json.load(file)
-            all_sections.extend(sections)
-    return all_sections
-
-def build_indexes(sections):
-    """Build FAISS and BM25 indexes from the given sections."""
-    # Step 1: Index Titles in FAISS
-    title_texts = [sec["title"] for sec in sections]
-    title_embeddings = text_model.encode(title_texts)
-    dim = title_embeddings.shape[1]
+    """Load all section stores from the given directory."""
+    return [sec for store_path in index_store.find_doc_files(directory) for sec in iter_sections(store_path)]
+
+def embed_sections(sections, section_hashes=None, previous=None, cache_dir=None):
+    """
+    Encode section titles and code blocks. sections can be any iterable, such as a streamed
+    section store; only the texts that still need encoding are kept in memory.
+    Sections whose hash appears in `previous` reuse their stored vectors instead of being re-encoded,
+    and with cache_dir set the remaining texts go through the on-disk embedding cache.
+    Returns (title embeddings, code embeddings or None, code_ids, number of sections encoded),
+    where code_ids[row] is the section ID of each code embedding row.
+    """
+    previous = previous or {}
+    title_cache = EmbeddingCache(cache_dir, models.TEXT_MODEL_NAME) if cache_dir else None
+    code_cache = EmbeddingCache(cache_dir, models.CODE_MODEL_NAME) if cache_dir else None
+
+    title_vectors = []
+    code_vectors = {}
+    code_ids = []
+    todo, todo_titles = [], []
+    todo_code, todo_code_texts = [], []
+    for i, sec in enumerate(sections):
+        if sec["code"]:
+            code_ids.append(i)
+        h = section_hashes[i] if section_hashes else None
+        if h in previous:
+            title_vector, code_vector = previous[h]
+            title_vectors.append(title_vector)
+            if code_vector is not None:
+                code_vectors[i] = code_vector
+            continue
+
+        # Only new or changed sections go through the encoders
+        title_vectors.append(None)
+        todo.append(i)
+        todo_titles.append(sec["title"])
+        if sec["code"]:
+            todo_code.append(i)
+            todo_code_texts.append("\n".join(sec["code"]))
+
+    if todo:
+        encoded = cached_encode(models.TEXT_MODEL_NAME, todo_titles, title_cache)
+        for i, vector in zip(todo, encoded):
+            title_vectors[i] = vector
+
+    if todo_code:
+        encoded = cached_encode(models.CODE_MODEL_NAME, todo_code_texts, code_cache)
+        for i, vector in zip(todo_code, encoded):
+            code_vectors[i] = vector
 
-    faiss_index = faiss.IndexFlatL2(dim)
-    faiss_index.add(np.array(title_embeddings, dtype=np.float32))
+    for cache in (title_cache, code_cache):
+        if cache is not None:
+            cache.save()
+
+    title_embeddings = np.array(title_vectors, dtype=np.float32)
+    code_embeddings = np.array([code_vectors[i] for i in code_ids], dtype=np.float32) if code_ids else None
+
+    return title_embeddings, code_embeddings, code_ids, len(todo)
+
+def build_indexes(sections, title_embeddings=None, code_embeddings=None, index_type="auto", quantization="fp16"):
+    """
+    Build FAISS and BM25 indexes from the given sections, encoding them unless embeddings are passed in.
+    With embeddings passed in, sections is only iterated once (by the BM25 build), so it can be a stream.
+    index_type is one of ann_index.INDEX_TYPES; "auto" picks flat, HNSW or IVF-PQ by corpus size.
+    quantization ("none", "fp16", "int8") sets how flat and HNSW indexes store their vectors.
+    """
+    if title_embeddings is None:
+        sections = list(sections)
+        title_embeddings, code_embeddings, _, _ = embed_sections(sections)
+
+    # Step 1: Index Titles in FAISS
+    faiss_index = build_faiss_index(title_embeddings, index_type, quantization)
 
     # Step 2: Prepare BM25 for Paragraph Search
-    paragraph_texts = [" ".join(sec["content"]) for sec in sections]  
-    bm25 = BM25Okapi([text.split() for text in paragraph_texts])
+    bm25 = BM25Index.build(sections)
 
     # Step 3: Prepare FAISS for Code Search
-    code_texts = ["\n".join(sec["code"]) for sec in sections if sec["code"]]
-    code_embeddings = code_model.encode(code_texts) if code_texts else None
-
     code_index = None
     if code_embeddings is not None:
-        code_index = faiss.IndexFlatL2(code_embeddings.shape[1])
-        code_index.add(np.array(code_embeddings, dtype=np.float32))
-
-    return faiss_index, bm25, code_index, sections
-
-def search_docs(query, directory, k=3):
-    """Search for relevant documents using FAISS and BM25."""
-    sections = load_structured_docs(directory)
-    if not sections:
-        return []
-
-    faiss_index, bm25, code_index, sections = build_indexes(sections)
-
-    results = []
-    query_embedding = text_model.encode([query])
-    _, title_idx = faiss_index.search(np.array(query_embedding, dtype=np.float32), k)
-    best_sections = [sections[i] for i in title_idx[0]]
-
-    for best_section in best_sections:
-        section_data = {
-            "title": best_section["title"],
-            "url": best_section["url"],
-            "best_paragraph": None,
-            "code": best_section.get("code", [])
-        }
-
-        section_paragraphs = best_section["content"]
-        if section_paragraphs:
-            bm25_section = BM25Okapi([p.split() for p in section_paragraphs])
-            paragraph_scores = bm25_section.get_scores(query.split())
-            best_paragraph_idx = np.argmax(paragraph_scores)
-            section_data["best_paragraph"] = section_paragraphs[best_paragraph_idx]
-
-        results.append(section_data)
-
-    return results
+        code_index = build_faiss_index(code_embeddings, index_type, quantization)
+
+    return faiss_index, bm25, code_index
+
+def write_chunks(store_path, index_path):
+    """Chunk a library's section store into the shard's chunk store; returns the hash of each chunk."""
+    chunk_hashes = []
+    with SectionWriter(index_path, index_store.CHUNKS_FILE) as writer:
+        for chunk in chunk_sections(iter_sections(store_path)):
+            writer.write([chunk])
+            chunk_hashes.append(index_store.section_hash(chunk))
+    return chunk_hashes
+
+def library_doc_files(directory):
+    """Map each scraped library (its vectordb/<library> folder) to its section store."""
+    migrate_legacy_docs(directory)
+    return {os.path.basename(os.path.dirname(store_path)): store_path for store_path in index_store.find_doc_files(directory)}
+
+def update_shard(directory, store_path, index_type="auto", quantization="fp16"):
+    """
+    Build and persist the index shard of one library in vectordb/<library>/index/.
+    The library's sections are split or merged into bounded chunks (see scraping/chunking.py),
+    which are what gets indexed and returned by searches.
+    The shard is left as is when neither its docs nor the index options changed, and
+    otherwise only its new or changed chunks are re-embedded. Sections and chunks are
+    streamed rather than loaded at once. Returns the number of chunks.
+    """
+    index_path = os.path.join(os.path.dirname(store_path), index_store.SHARD_INDEX_DIR)
+    chunks_path = os.path.join(index_path, index_store.CHUNKS_FILE)
+    fingerprint = index_store.docs_fingerprint(directory, [store_path])
+    relpath = os.path.relpath(store_path, directory)
+    if index_store.is_empty_shard(index_path, fingerprint):
+        return 0
+
+    manifest = index_store.load_manifest(index_path)
+    options = {
+        "title_model": models.TEXT_MODEL_NAME,
+        "code_model": models.CODE_MODEL_NAME,
+        "index_type": index_type,
+        "quantization": quantization,
+        "chunking": [CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, CHUNK_MIN_TOKENS],
+    }
+    store_hash = index_store.file_hash(store_path)
+
+    # A rescrape that produced identical docs only needs the new fingerprint recorded
+    old_entry = manifest["libraries"].get(relpath)
+    if all(manifest.get(key) == value for key, value in options.items()) and old_entry and old_entry["hash"] == store_hash \
+            and os.path.exists(os.path.join(index_path, index_store.INDEX_META_FILE)):
+        index_store.save_index_meta(index_path, fingerprint)
+        return len(old_entry["sections"])
+
+    chunk_hashes = write_chunks(store_path, index_path)
+    if not chunk_hashes:
+        # Only the fingerprint is kept, so loading doesn't rebuild the empty library every time
+        shutil.rmtree(index_path)
+        os.makedirs(index_path)
+        index_store.save_index_meta(index_path, fingerprint, empty=True)
+        return 0
+
+    previous = {}
+    if manifest.get("title_model") == models.TEXT_MODEL_NAME and manifest.get("code_model") == models.CODE_MODEL_NAME:
+        previous = index_store.load_previous_embeddings(index_path, manifest)
+
+    cache_dir = os.path.join(directory, "embedding_cache")
+    title_embeddings, code_embeddings, code_ids, encoded = embed_sections(iter_sections(chunks_path), chunk_hashes, previous, cache_dir)
+    print(f"🧠 {encoded} new or changed chunks to embed, reused {len(chunk_hashes) - encoded} from the last build.")
+
+    faiss_index, bm25, code_index = build_indexes(iter_sections(chunks_path), title_embeddings, code_embeddings, index_type, quantization)
+
+    # Mean title embedding, so the router can tell which library a query is about
+    centroid = title_embeddings.mean(axis=0)
+    centroid /= np.linalg.norm(centroid) or 1.0
+
+    libraries = {relpath: {"hash": store_hash, "sections": chunk_hashes}}
+    new_manifest = {**options, "libraries": libraries, "code_ids": code_ids}
+    index_store.save_embeddings(index_path, new_manifest, title_embeddings, code_embeddings)
+    index_store.save_indexes(index_path, faiss_index, bm25, code_index, code_ids, centroid, fingerprint)
+    return len(chunk_hashes)
+
+def update_indexes(directory, index_type="auto", quantization="fp16"):
+    """
+    Build or refresh one index shard per scraped library (see update_shard).
+    Returns the number of libraries indexed, or None if there was nothing to index.
+    """
+    indexed = 0
+    for library, store_path in library_doc_files(directory).items():
+        print(f"🧠 Indexing {library}...")
+        if update_shard(directory, store_path, index_type, quantization):
+            indexed += 1
+    return indexed or None
+
+def load_shards(directory):
+    """
+    Load every library's (memory-mapped) shard, rebuilding only shards whose docs
+    changed since they were saved. Returns {library: Shard}.
+    """
+    shards = {}
+    for library, store_path in library_doc_files(directory).items():
+        index_path = os.path.join(os.path.dirname(store_path), index_store.SHARD_INDEX_DIR)
+        fingerprint = index_store.docs_fingerprint(directory, [store_path])
+        if index_store.is_empty_shard(index_path, fingerprint):
+            continue
+        chunks_path = os.path.join(index_path, index_store.CHUNKS_FILE)
+        stored = index_store.load_indexes(index_path, chunks_path, fingerprint)
+        if stored is None:
+            print(f"🧠 Search index for {library} is missing or out of date, rebuilding...")
+            # Keep the index type and quantization the shard was last built with
+            manifest = index_store.load_manifest(index_path)
+            if not update_shard(directory, store_path, manifest.get("index_type", "auto"), manifest.get("quantization", "fp16")):
+                continue
+            stored = index_store.load_indexes(index_path, chunks_path, fingerprint)
+            if stored is None:
+                continue
+        shards[library] = Shard(library, *stored, version=index_store.index_version(index_store.load_manifest(index_path)))
+    return shards
+
+# Retrieval modes: "title" only searches the title index; "hybrid" also queries the
+# paragraph BM25 and code indexes and merges the three rankings with reciprocal rank fusion.
+SEARCH_MODES = ["title", "hybrid"]
+
+# Candidates each signal contributes to the fusion; 0 turns a signal off
+DEFAULT_BUDGETS = {"title": 20, "bm25": 20, "code": 10}
+RRF_K = 60
+
+# Queries per chunk in search_batch; bounds the (queries x paragraphs) BM25 score matrix
+BATCH_SIZE = 64
+
+# Shards searched in parallel
+SHARD_WORKERS = min(8, os.cpu_count() or 1)
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Merge ranked lists of section keys: each list adds 1 / (k + rank) to a section's score."""
+    scores = {}
+    for ranking in rankings:
+        for rank, section_key in enumerate(ranking, start=1):
+            scores[section_key] = scores.get(section_key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+def merge_candidates(candidates, signal, budget):
+    """
+    Merge one signal's per-shard candidates [(shard name, {signal: [(section ID, score)]})]
+    into the budget best (shard name, section ID) keys. Title and code scores are negated
+    L2 distances, which compare across shards. BM25 scores do not (IDF and average paragraph
+    length are per shard), so BM25 lists are interleaved by rank, ties going to the
+    candidate scoring closest to its shard's best.
+    """
+    pooled = []
+    for name, shard_candidates in candidates:
+        ranked = shard_candidates[signal]
+        if signal == "bm25":
+            best = ranked[0][1] if ranked and ranked[0][1] > 0 else 1.0
+            pooled.extend(((-rank, score / best), name, section_id) for rank, (section_id, score) in enumerate(ranked))
+        else:
+            pooled.extend((score, name, section_id) for section_id, score in ranked)
+    return [(name, section_id) for _, name, section_id in sorted(pooled, reverse=True)[:budget]]
+
+class SearchEngine:
+    """
+    Search state for a whole chat session: models, one index shard per library and the
+    router choosing which shards a question goes to. Built once so each question only
+    pays for encoding the query and searching its shards.
+    """
+
+    def __init__(self, directory, mode="hybrid", budgets=None):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {', '.join(SEARCH_MODES)}")
+        self.directory = directory
+        self.mode = mode
+        self.budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+        self.executor = ThreadPoolExecutor(max_workers=SHARD_WORKERS)
+        self.encoder = ThreadPoolExecutor(max_workers=1)
+        self.reload()
+
+    @property
+    def text_model(self):
+        """MiniLM model from the shared registry, loaded on first use."""
+        return models.get_text_model()
+
+    @property
+    def code_model(self):
+        """CodeBERT model from the shared registry, loaded on first use."""
+        return models.get_code_model()
+
+    def reload(self):
+        """(Re)load every library shard and the router over them."""
+        self.fingerprint = index_store.docs_fingerprint(self.directory)
+        self.shards = load_shards(self.directory)
+        # Changes whenever a rescan changes the docs of any library
+        self.index_version = hashlib.sha256(
+            json.dumps({name: shard.version for name, shard in self.shards.items()}, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        self.router = ShardRouter(self.shards, load_workspace_libraries(self.directory))
+
+    def warm_up(self):
+        """Load the query models and page in the indexes ahead of the first question."""
+        models.get_text_model()
+        if self.mode == "hybrid":
+            models.get_code_model()
+        if self.shards:
+            self.search("warm up")
+
+    def refresh_if_stale(self):
+        """Reload if a rescan changed the docs since this engine was built."""
+        if index_store.docs_fingerprint(self.directory) != self.fingerprint:
+            self.reload()
+
+    def encode_code_queries(self, queries):
+        """CodeBERT embeddings of the queries, for the code indexes."""
+        if len(queries) == 1:
+            return query_processing.encode_query(queries[0], models.CODE_MODEL_NAME)
+        return query_processing.encode_queries(queries, models.CODE_MODEL_NAME)
+
+    def search(self, query, k=3, query_embedding=None, mode=None):
+        """
+        Search for relevant documents using FAISS and BM25.
+        Pass query_embedding when the caller already encoded the query (e.g. preprocess_query).
+        """
+        if query_embedding is None:
+            query_embedding = query_processing.encode_query(query)
+        return self.search_batch([query], k, query_embedding, mode)[0]
+
+    def search_batch(self, queries, k=3, query_embeddings=None, mode=None):
+        """
+        Search many queries at once: one batched encode and one FAISS matrix search per shard,
+        with BM25 postings shared across the batch. Returns one result list per query.
+        """
+        self.refresh_if_stale()
+        if not self.shards:
+            return [[] for _ in queries]
+
+        results = []
+        for start in range(0, len(queries), BATCH_SIZE):
+            chunk = queries[start:start + BATCH_SIZE]
+            chunk_embeddings = None if query_embeddings is None else query_embeddings[start:start + BATCH_SIZE]
+            results.extend(self.search_chunk(chunk, k, chunk_embeddings, mode or self.mode))
+        return results
+
+    def search_chunk(self, queries, k, query_embeddings, mode):
+        """search_batch for at most BATCH_SIZE queries (bounds the BM25 score matrix)."""
+        if query_embeddings is None:
+            query_embeddings = query_processing.encode_queries(queries)
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        budgets = {"title": k, "bm25": 0, "code": 0} if mode == "title" else self.budgets
+
+        # CodeBERT encoding overlaps with the shards' title and BM25 work
+        code_future = None
+        if budgets["code"] > 0 and any(shard.code_index is not None for shard in self.shards.values()):
+            code_future = self.encoder.submit(self.encode_code_queries, queries)
+
+        rows_by_shard = {}
+        for row, (query, embedding) in enumerate(zip(queries, query_embeddings)):
+            for name in self.router.route(query, embedding):
+                rows_by_shard.setdefault(name, []).append(row)
+
+        # Fan out to the chosen shards in parallel
+        futures = {}
+        for name, rows in rows_by_shard.items():
+            get_code_embeddings = None
+            if code_future is not None:
+                get_code_embeddings = partial(lambda rows: np.asarray(code_future.result())[rows], rows)
+            futures[name] = self.executor.submit(
+                self.shards[name].candidates, [queries[row] for row in rows], query_embeddings[rows], get_code_embeddings, budgets
+            )
+
+        candidates = [[] for _ in queries]  # per query: (shard name, {signal: [(section ID, score)]})
+        paragraph_scores = {}  # (shard name, query row) -> BM25 score of every paragraph in the shard
+        for name, future in futures.items():
+            shard_candidates, shard_scores = future.result()
+            for local_row, row in enumerate(rows_by_shard[name]):
+                candidates[row].append((name, shard_candidates[local_row]))
+                paragraph_scores[(name, row)] = shard_scores[local_row]
+
+        results = []
+        for row, query in enumerate(queries):
+            # Merge each signal across shards, then fuse the signals
+            rankings = [merge_candidates(candidates[row], signal, budget) for signal, budget in budgets.items()]
+            section_keys = rankings[0][:k] if mode == "title" else reciprocal_rank_fusion(rankings)[:k]
+            results.append(self.hydrate(section_keys, query, row, paragraph_scores))
+        return results
+
+    def hydrate(self, section_keys, query, row, paragraph_scores):
+        """Turn ranked (shard name, section ID) keys into result dicts with each section's best paragraph."""
+        results = []
+        for name, section_id in section_keys:
+            shard = self.shards[name]
+            best_section = shard.sections[section_id]
+            best_paragraph_idx = shard.bm25.best_paragraphs(query, [section_id], paragraph_scores[(name, row)])[0]
+            section_data = {
+                "title": best_section["title"],
+                "url": best_section["url"],
+                "headings": best_section.get("headings") or [best_section["title"]],
+                "library": name,
+                "best_paragraph": None,
+                "code": best_section.get("code", [])
+            }
+
+            if best_paragraph_idx is not None:
+                section_data["best_paragraph"] = best_section["content"][best_paragraph_idx]
+
+            results.append(section_data)
+
+        return results
+
+def search_docs(query, directory, k=3, query_embedding=None, mode="hybrid"):
+    """One-off search; use a SearchEngine when asking several questions."""
+    return SearchEngine(directory, mode).search(query, k, query_embedding)
+
+def search_docs_batch(queries, directory, k=3, mode="hybrid"):
+    """Search a list of queries with batched encoding and FAISS search; one result list per query."""
+    return SearchEngine(directory, mode).search_batch(list(queries), k)
 
 if __name__ == "__main__":
     # Example usage
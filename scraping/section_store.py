@@ -0,0 +1,114 @@
+import os
+import json
+import numpy as np
+
+# Per-library section store in .alexandria/vectordb/<library>/: one JSON section per line
+# plus an int64 array of line offsets. The scraper appends sections page by page, the
+# indexer streams them back and search results fetch single sections by ID (line number).
+SECTIONS_FILE = "sections.jsonl"
+OFFSETS_FILE = "sections.offsets.npy"  # see offsets_path
+
+# Written by older versions as one indented JSON list; converted on first use
+LEGACY_DOCS_FILE = "structured_docs.json"
+
+def offsets_path(path):
+    """Offsets file belonging to the store at path (sections.jsonl -> sections.offsets.npy)."""
+    return os.path.splitext(path)[0] + ".offsets.npy"
+
+class SectionWriter:
+    """
+    Writes a section store page by page. The sections go to a temporary file that
+    replaces the old store on close(), so readers never see a half-written store.
+    """
+
+    def __init__(self, directory, filename=SECTIONS_FILE):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, filename)
+        self.offsets_path = offsets_path(self.path)
+        self.file = open(self.path + ".tmp", "wb")
+        self.offsets = [0]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def write(self, sections):
+        """Append sections to the store."""
+        for sec in sections:
+            line = (json.dumps(sec, ensure_ascii=False) + "\n").encode("utf-8")
+            self.file.write(line)
+            self.offsets.append(self.offsets[-1] + len(line))
+
+    def close(self):
+        """Flush the sections and swap the new store in."""
+        self.file.close()
+        with open(self.offsets_path + ".tmp", "wb") as file:
+            np.save(file, np.array(self.offsets, dtype=np.int64))
+        os.replace(self.offsets_path + ".tmp", self.offsets_path)
+        os.replace(self.path + ".tmp", self.path)
+
+    def abort(self):
+        """Drop the sections written so far and keep the previous store."""
+        self.file.close()
+        os.remove(self.path + ".tmp")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def migrate_legacy_docs(directory):
+    """Convert structured_docs.json files left by older versions into section stores."""
+    for root, dirs, files in os.walk(directory):
+        if LEGACY_DOCS_FILE in files and SECTIONS_FILE not in files:
+            with open(os.path.join(root, LEGACY_DOCS_FILE), "r", encoding="utf-8") as file:
+                sections = json.load(file)
+            with SectionWriter(root) as writer:
+                writer.write(sections)
+            print(f"✅ Converted {os.path.join(root, LEGACY_DOCS_FILE)} to {SECTIONS_FILE}")
+
+def iter_sections(path):
+    """Stream the sections of a store one at a time."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def scan_offsets(path):
+    """Recompute the line offsets of a store by reading it once."""
+    offsets = [0]
+    position = 0
+    with open(path, "rb") as file:
+        for line in file:
+            position += len(line)
+            if line.strip():  # blank lines end up in front of the next section, as iter_sections skips them
+                offsets.append(position)
+    return np.array(offsets, dtype=np.int64)
+
+class SectionStore:
+    """Random access to the sections of a store by ID, memory-mapped so only fetched rows are read."""
+
+    def __init__(self, path):
+        self.path = path
+        size = os.path.getsize(path)
+        offsets_file = offsets_path(path)
+        self.offsets = np.load(offsets_file, mmap_mode="r") if os.path.exists(offsets_file) else None
+        if self.offsets is None or not len(self.offsets) or self.offsets[-1] != size:
+            # Missing or out of date (e.g. a hand-edited store); the store itself is the source of truth
+            self.offsets = scan_offsets(path)
+        # np.memmap cannot map empty files
+        self.blob = np.memmap(path, dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return json.loads(bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8"))
+
+    def __iter__(self):
+        return iter_sections(self.path)
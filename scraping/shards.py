@@ -0,0 +1,101 @@
+import os
+import re
+import json
+import numpy as np
+
+# Shards searched per query when neither the query nor the workspace narrows it down
+ROUTER_MAX_SHARDS = 3
+
+class Shard:
+    """One library's memory-mapped indexes and sections (.alexandria/vectordb/<library>/index/)."""
+
+    def __init__(self, name, title_index, bm25, code_index, sections, code_ids, centroid, version=None):
+        self.name = name
+        self.title_index = title_index
+        self.bm25 = bm25
+        self.code_index = code_index
+        self.sections = sections
+        self.code_ids = code_ids  # code_ids[row] is the section ID of row `row` in the code index
+        self.centroid = centroid  # mean title embedding, used for routing
+        self.version = version  # index_store.index_version of the shard
+
+    def candidates(self, queries, query_embeddings, get_code_embeddings, budgets):
+        """
+        Per-signal candidates for each query as {signal: [(section ID, score)]}, best first,
+        plus the paragraph BM25 scores used to pick each section's best paragraph.
+        Title and code scores are negated L2 distances, so they compare across shards.
+        get_code_embeddings returns the CodeBERT query embeddings (or is None to skip code search);
+        it is only called after the title and BM25 work so the encoder can run meanwhile.
+        """
+        candidates = [{"title": [], "bm25": [], "code": []} for _ in queries]
+
+        if budgets["title"] > 0:
+            distances, ids = self.title_index.search(np.asarray(query_embeddings, dtype=np.float32), budgets["title"])
+            for row, (row_distances, row_ids) in enumerate(zip(distances, ids)):
+                candidates[row]["title"] = [(int(i), -float(d)) for d, i in zip(row_distances, row_ids) if i >= 0]
+
+        paragraph_scores = self.bm25.score_batch(queries)
+        if budgets["bm25"] > 0:
+            for row, scores in enumerate(paragraph_scores):
+                candidates[row]["bm25"] = self.bm25.top_sections(scores, budgets["bm25"])
+
+        if get_code_embeddings is not None and self.code_index is not None and budgets["code"] > 0:
+            distances, ids = self.code_index.search(np.asarray(get_code_embeddings(), dtype=np.float32), budgets["code"])
+            for row, (row_distances, row_ids) in enumerate(zip(distances, ids)):
+                candidates[row]["code"] = [(int(self.code_ids[i]), -float(d)) for d, i in zip(row_distances, row_ids) if i >= 0]
+
+        return candidates, paragraph_scores
+
+def load_workspace_libraries(directory):
+    """Lowercased names of the libraries the workspace uses, from .alexandria/combined_libraries.json."""
+    combined_libraries_path = os.path.join(directory, "combined_libraries.json")
+    if not os.path.exists(combined_libraries_path):
+        return set()
+    try:
+        with open(combined_libraries_path, "r", encoding="utf-8") as file:
+            combined_libraries = json.load(file)
+    except Exception as e:
+        print(f"⚠️ Could not read {combined_libraries_path}: {e}")
+        return set()
+    return {lib["library"].lower() for libraries in combined_libraries.values() for lib in libraries}
+
+def name_aliases(name):
+    """Ways a library name can appear in a normalized (lowercase, no punctuation) query."""
+    name = name.lower()
+    return {name, re.sub(r"[-_.]", "", name), re.sub(r"[-_.]", " ", name)}
+
+class ShardRouter:
+    """
+    Picks which library shards a query is searched in:
+    1. libraries named in the query, otherwise
+    2. the libraries the workspace uses (all shards if none match), narrowed down to
+       the ROUTER_MAX_SHARDS whose title centroid is closest to the query.
+    """
+
+    def __init__(self, shards, workspace_libraries=None, max_shards=ROUTER_MAX_SHARDS):
+        self.names = list(shards)
+        self.max_shards = max_shards
+        self.patterns = {
+            name: re.compile("|".join(rf"\b{re.escape(alias)}\b" for alias in name_aliases(name)))
+            for name in self.names
+        }
+        self.centroids = np.array([shards[name].centroid for name in self.names], dtype=np.float32)
+
+        workspace_libraries = workspace_libraries or set()
+        self.default_shards = [i for i, name in enumerate(self.names) if name.lower() in workspace_libraries]
+        if not self.default_shards:
+            self.default_shards = list(range(len(self.names)))
+
+    def route(self, query, query_embedding):
+        """Names of the shards to search for this query."""
+        query = query.lower()
+        mentioned = [name for name in self.names if self.patterns[name].search(query)]
+        if mentioned:
+            return mentioned
+
+        if len(self.default_shards) <= self.max_shards:
+            return [self.names[i] for i in self.default_shards]
+
+        similarity = self.centroids[self.default_shards] @ np.asarray(query_embedding, dtype=np.float32).ravel()
+        closest = np.argsort(-similarity)[:self.max_shards]
+        return [self.names[self.default_shards[i]] for i in closest]
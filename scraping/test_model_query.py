@@ -1,18 +1,96 @@
-import ollama
+import json
+import string
+import hashlib
+from scraping import models
 from scraping import search
 from scraping import query_processing
+from scraping.context import CONTEXT_TOKEN_BUDGET, build_context
+from scraping.conversation import Conversation, user_message
 
-def get_ai_response(query: str, directory: str) -> str:
+# Words that make a question lean on earlier turns ("what about its timeout?"); such
+# follow-ups are only answered from the cache after the same conversation history
+FOLLOW_UP_WORDS = {"it", "its", "this", "that", "these", "those", "they", "them", "their",
+                   "above", "previous", "earlier", "again", "same", "instead", "else"}
+
+def warm_up_llm(keep_alive=models.LLM_KEEP_ALIVE):
+    """Have Ollama load the chat model ahead of the first question (an empty prompt only loads it)."""
+    models.get_llm_client().generate(model=models.LLM_MODEL_NAME, prompt="", keep_alive=keep_alive, options=models.LLM_OPTIONS)
+
+def answer_version(engine: search.SearchEngine, context_tokens: int) -> str:
+    """Everything besides the question that an answer depends on: indexes, search mode, context budget and chat model."""
+    engine.refresh_if_stale()
+    return f"{engine.index_version}:{engine.mode}:{context_tokens}:{models.LLM_MODEL_NAME}"
+
+def is_follow_up(query: str) -> bool:
+    """Whether a question refers back to the conversation instead of standing on its own."""
+    words = query.lower().translate(str.maketrans("", "", string.punctuation)).split()
+    return any(word in FOLLOW_UP_WORDS for word in words)
+
+def history_digest(conversation: Conversation) -> str:
+    """Hash of the turns a new prompt would include."""
+    conversation.trim()
+    return hashlib.sha256(json.dumps(conversation.turns).encode("utf-8")).hexdigest()[:16]
+
+def build_user_message(query: str, clean_query: str, query_vector, engine: search.SearchEngine,
+                       context_tokens: int = CONTEXT_TOKEN_BUDGET) -> str:
     """
-    Processes the user query, searches relevant documentation,
-    and returns an AI-generated response.
+    Searches relevant documentation with the session's search engine and builds the user turn.
+    At most context_tokens (approximate) of documentation go into it.
     """
+    results = engine.search(clean_query, query_embedding=query_vector)  # Reuse the query vector
+    return user_message(query, build_context(results, context_tokens))
+
+def get_ai_response(query: str, engine: search.SearchEngine, context_tokens: int = CONTEXT_TOKEN_BUDGET,
+                    keep_alive=models.LLM_KEEP_ALIVE, cache=None, conversation=None) -> str:
+    """Processes the user query and returns the whole AI-generated response (see stream_ai_response)."""
+    return "".join(stream_ai_response(query, engine, context_tokens, keep_alive, cache, conversation))
+
+def stream_ai_response(query: str, engine: search.SearchEngine, context_tokens: int = CONTEXT_TOKEN_BUDGET,
+                       keep_alive=models.LLM_KEEP_ALIVE, cache=None, conversation=None):
+    """
+    Processes the user query and yields the AI-generated response piece by piece as Ollama generates it.
+    Closing the generator (e.g. on Ctrl-C) drops the connection, which stops the generation.
+
+    With a Conversation the question is asked as the next turn of the chat and the answer is
+    added to its history; without one it is a standalone question. An AnswerCache answers
+    questions close enough to an earlier one about the same indexes, whatever came before
+    them, except follow-ups (see is_follow_up), which also need the same history. Only
+    answers generated in full are cached.
+    """
+    conversation = conversation if conversation is not None else Conversation()
     clean_query, query_vector = query_processing.preprocess_query(query)
-    context = search.search_docs(clean_query, directory)
-    
-    response = ollama.chat(
-        model='llama3.2',
-        messages=[{'role': 'user', 'content': f'Answer this coding query:{query} with this context from the documentation: {context}'}]
+
+    use_cache = cache is not None
+    if use_cache:
+        # Keyed on the whole question: the search query drops stopwords such as "not",
+        # which would give "does X follow redirects" the answer to "does X not follow redirects"
+        cache_vector = query_processing.encode_query(query_processing.cache_query(query))
+        version = answer_version(engine, context_tokens)
+        # Retrieval only looks at the question, but a follow-up's answer depends on the turns before it
+        history = history_digest(conversation) if conversation.turns and is_follow_up(query) else ""
+        cached = cache.get(cache_vector, version, history)
+        if cached is not None:
+            conversation.add_turn(user_message(query), cached)
+            yield cached
+            return
+
+    user_content = build_user_message(query, clean_query, query_vector, engine, context_tokens)
+    stream = models.get_llm_client().chat(
+        model=models.LLM_MODEL_NAME,
+        messages=conversation.messages(user_content),
+        keep_alive=keep_alive,
+        options=models.LLM_OPTIONS,
+        stream=True,
     )
-    
-    return response['message']['content']
+    parts = []
+    try:
+        for part in stream:
+            parts.append(part['message']['content'])
+            yield parts[-1]
+    finally:
+        stream.close()
+
+    answer = "".join(parts)
+    conversation.add_turn(user_content, answer)
+    if use_cache:
+        cache.put(query, cache_vector, answer, version, history)
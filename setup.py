@@ -11,9 +11,10 @@ setup(
         "prompt_toolkit",
         "rich",
         "sentence-transformers",
-        "rank-bm25",
         "faiss-cpu",
-        "ollama"
+        "ollama",
+        "lxml",
+        "brotli"
     ],
     entry_points={
         "console_scripts": [
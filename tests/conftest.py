@@ -0,0 +1,38 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from scraping import models, query_processing
+
+
+class StubEncoder:
+    """Bag-of-words hashing encoder standing in for a SentenceTransformer; counts encoded texts."""
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.encoded = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        texts = list(texts)
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in str(text).lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1
+            vectors[row] /= np.linalg.norm(vectors[row]) or 1
+        return vectors
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    """Stub text and code encoders and a small stopword list, so no model is downloaded."""
+    encoders = {models.TEXT_MODEL_NAME: StubEncoder(64), models.CODE_MODEL_NAME: StubEncoder(96)}
+    monkeypatch.setattr(models, "_models", dict(encoders))
+    monkeypatch.setattr(models, "_stop_words", {"a", "the", "does", "do", "i", "how", "why", "not", "no", "to"})
+    query_processing.encode_query.cache_clear()
+    yield encoders
+    query_processing.encode_query.cache_clear()
@@ -0,0 +1,27 @@
+import faiss
+import numpy as np
+
+from scraping.ann_index import RECALL_TARGET, build_faiss_index
+
+
+def clustered(num_vectors, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_vectors // 200, dim)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=num_vectors)] + 0.3 * rng.normal(size=(num_vectors, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_ivfpq_reranks_to_recall_target():
+    corpus = clustered(12_000, 64)
+    rng = np.random.default_rng(1)
+    queries = corpus[rng.integers(len(corpus), size=100)] + 0.05 * rng.normal(size=(100, 64)).astype(np.float32)
+
+    exact = faiss.IndexFlatL2(64)
+    exact.add(corpus)
+    _, truth = exact.search(queries, 10)
+
+    index = build_faiss_index(corpus, "ivfpq")
+    assert isinstance(index, faiss.IndexRefine)
+    _, found = index.search(queries, 10)
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(found, truth)])
+    assert recall >= RECALL_TARGET
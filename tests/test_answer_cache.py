@@ -0,0 +1,103 @@
+import numpy as np
+from scraping.answer_cache import AnswerCache
+
+
+def test_similar_question_hits_same_version(tmp_path):
+    cache = AnswerCache(tmp_path)
+    cache.put("how do I set a timeout", [1.0, 0.0, 0.0], "Pass timeout=...", "v1")
+
+    reloaded = AnswerCache(tmp_path)
+    assert reloaded.get([0.99, 0.05, 0.0], "v1") == "Pass timeout=..."
+    assert reloaded.get([0.0, 1.0, 0.0], "v1") is None
+    assert reloaded.get([1.0, 0.0, 0.0], "v2") is None
+
+
+def test_new_version_retires_old_answers(tmp_path):
+    cache = AnswerCache(tmp_path)
+    cache.put("a", [1.0, 0.0], "old", "v1")
+    cache.put("b", [0.0, 1.0], "new", "v2")
+    assert len(cache) == 1
+    assert cache.get([1.0, 0.0], "v1") is None
+
+
+def test_lru_and_ttl_eviction(tmp_path):
+    cache = AnswerCache(tmp_path, max_entries=2)
+    cache.put("a", [1.0, 0.0, 0.0], "A", "v")
+    cache.put("b", [0.0, 1.0, 0.0], "B", "v")
+    assert cache.get([1.0, 0.0, 0.0], "v") == "A"  # a is now more recently used than b
+    cache.put("c", [0.0, 0.0, 1.0], "C", "v")
+    assert sorted(entry["query"] for entry in cache.entries) == ["a", "c"]
+
+    expired = AnswerCache(tmp_path, ttl=-1)
+    assert expired.get(np.array([0.0, 0.0, 1.0]), "v") is None
+
+
+class FakeEngine:
+    index_version = "v1"
+    mode = "hybrid"
+
+    def refresh_if_stale(self):
+        pass
+
+    def search(self, query, query_embedding=None):
+        return []
+
+
+class FakeLLM:
+    def __init__(self):
+        self.questions = 0
+
+    def chat(self, messages, **kwargs):
+        self.questions += 1
+        answer = f"answer {self.questions}"
+
+        def stream():
+            yield {"message": {"content": answer}}
+        return stream()
+
+
+def test_negated_question_is_not_a_cache_hit(tmp_path, stub_models, monkeypatch):
+    from scraping import models
+    from scraping.test_model_query import get_ai_response
+
+    llm = FakeLLM()
+    monkeypatch.setattr(models, "_llm_client", llm)
+    cache = AnswerCache(tmp_path)
+    engine = FakeEngine()
+
+    first = get_ai_response("Why does requests not follow redirects?", engine, cache=cache)
+    assert get_ai_response("Why does requests follow redirects?", engine, cache=cache) != first
+    assert get_ai_response("why does requests NOT follow   redirects?", engine, cache=cache) == first
+    assert llm.questions == 2
+
+
+def test_later_turns_use_the_cache(tmp_path, stub_models, monkeypatch):
+    from scraping import models
+    from scraping.conversation import Conversation
+    from scraping.test_model_query import get_ai_response
+
+    llm = FakeLLM()
+    monkeypatch.setattr(models, "_llm_client", llm)
+    cache = AnswerCache(tmp_path)
+    engine = FakeEngine()
+
+    timeout = get_ai_response("How do I set a timeout?", engine, cache=cache)
+
+    conversation = Conversation()
+    get_ai_response("How do sessions keep cookies?", engine, cache=cache, conversation=conversation)
+    assert get_ai_response("How do I set a timeout?", engine, cache=cache, conversation=conversation) == timeout
+    assert llm.questions == 2
+    assert len(conversation.turns) == 2
+
+    # A follow-up only hits after the same history
+    follow_up = get_ai_response("Does it apply to redirects?", engine, cache=cache, conversation=conversation)
+    other = Conversation()
+    get_ai_response("How do sessions keep cookies?", engine, cache=cache, conversation=other)
+    assert get_ai_response("Does it apply to redirects?", engine, cache=cache, conversation=other) != follow_up
+    assert llm.questions == 4
+
+    replay = Conversation()
+    for question in ["How do sessions keep cookies?", "How do I set a timeout?"]:
+        get_ai_response(question, engine, cache=cache, conversation=replay)
+    assert get_ai_response("Does it apply to redirects?", engine, cache=cache, conversation=replay) == follow_up
+    assert llm.questions == 4
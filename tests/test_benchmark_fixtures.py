@@ -0,0 +1,19 @@
+import json
+import os
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+def test_labelled_sections_exist_in_corpus():
+    titles = set()
+    corpus = os.path.join(FIXTURES, "corpus")
+    for library in os.listdir(corpus):
+        with open(os.path.join(corpus, library, "structured_docs.json"), "r", encoding="utf-8") as file:
+            titles.update((library, sec["title"]) for sec in json.load(file))
+
+    with open(os.path.join(FIXTURES, "queries.jsonl"), "r", encoding="utf-8") as file:
+        queries = [json.loads(line) for line in file if line.strip()]
+    assert queries
+    for query in queries:
+        for relevant in query["relevant"]:
+            assert (relevant["library"], relevant["title"]) in titles, query["query"]
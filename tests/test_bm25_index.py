@@ -0,0 +1,29 @@
+import numpy as np
+from scraping.bm25_index import BM25Index, tokenize
+
+SECTIONS = [
+    {"title": "Timeouts", "content": ["You can tell Requests to stop waiting after a timeout.", "Sessions persist cookies."], "code": [], "url": "a"},
+    {"title": "Empty", "content": [], "code": [], "url": "b"},
+    {"title": "Streaming", "content": ["Stream large downloads.", "Set stream=True to avoid reading the body and set a timeout."], "code": [], "url": "c"},
+]
+
+
+def test_tokenize_normalizes():
+    assert tokenize("requests.get(URL, timeout=10)") == ["requests", "get", "url", "timeout", "10"]
+
+
+def test_best_paragraphs_per_section():
+    index = BM25Index.build(SECTIONS)
+    assert index.best_paragraphs("stream timeout", [0, 1, 2]) == [0, None, 1]
+
+
+def test_unknown_terms_score_zero():
+    index = BM25Index.build(SECTIONS)
+    assert not index.score("nonexistent words").any()
+
+
+def test_save_load_roundtrip(tmp_path):
+    index = BM25Index.build(SECTIONS)
+    index.save(tmp_path / "bm25")
+    loaded = BM25Index.load(tmp_path / "bm25")
+    np.testing.assert_allclose(loaded.score("cookies timeout"), index.score("cookies timeout"))
@@ -0,0 +1,49 @@
+from scraping.chunking import chunk_section, chunk_sections, chunk_tokens, count_tokens
+
+
+def section(title, content, code=(), url="https://docs.example/page"):
+    return {"title": title, "headings": ["Guide", title], "content": list(content), "code": list(code), "url": url}
+
+
+def test_count_tokens():
+    assert count_tokens("r = requests.get(url)") == 8
+
+
+def test_large_section_is_split_with_overlap():
+    sentences = [f"Sentence {i} explains how sessions keep cookies." for i in range(60)]
+    chunks = chunk_section(section("Sessions", [" ".join(sentences)]), max_tokens=64, overlap_tokens=16)
+    assert len(chunks) > 1
+    assert all(chunk_tokens(chunk) <= 64 for chunk in chunks)
+    assert all(chunk["title"] == "Sessions" and chunk["headings"] == ["Guide", "Sessions"] for chunk in chunks)
+    # Each chunk after the first starts with the end of the previous one
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous["content"][-1].endswith(chunk["content"][0])
+
+
+def test_run_on_text_with_many_tokens_per_word_stays_under_budget():
+    signatures = "foo.bar(baz), " * 400  # 7 tokens per word, one run-on sentence
+    chunks = chunk_section(section("Reference", [signatures]), max_tokens=256, overlap_tokens=32)
+    assert len(chunks) > 1
+    assert all(chunk_tokens(chunk) <= 256 for chunk in chunks)
+
+    blob = "a." * 300  # a single word of 600 tokens
+    chunks = chunk_section(section("Minified", [blob]), max_tokens=64, overlap_tokens=8)
+    assert all(chunk_tokens(chunk) <= 64 for chunk in chunks)
+    assert "".join(text for chunk in chunks for text in chunk["content"]) == blob  # cut between tokens, nothing lost
+
+
+def test_code_blocks_are_kept_whole():
+    code = ["x = 1\n" * 50]
+    chunks = chunk_section(section("Example", ["Short intro."], code), max_tokens=64, overlap_tokens=8)
+    assert [block for chunk in chunks for block in chunk["code"]] == code
+
+
+def test_tiny_sections_merge_into_neighbour_on_same_page():
+    sections = [
+        section("Quickstart", []),
+        section("Make a Request", ["Making a request with Requests is very simple. Import the module and call get with a URL."]),
+        section("Elsewhere", ["Tiny."], url="https://docs.example/other"),
+    ]
+    chunks = list(chunk_sections(sections, max_tokens=256, overlap_tokens=16, min_tokens=8))
+    assert [chunk["title"] for chunk in chunks] == ["Make a Request", "Elsewhere"]
+    assert chunks[0]["content"][0] == "Quickstart"
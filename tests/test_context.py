@@ -0,0 +1,31 @@
+from scraping.context import build_context
+from scraping.chunking import count_tokens
+
+RESULTS = [
+    {"title": "Timeouts", "headings": ["Quickstart", "Timeouts"], "url": "https://docs/quickstart", "library": "requests",
+     "best_paragraph": "Pass timeout to stop waiting. Nearly all production code should use it. It is not a limit on the whole download.",
+     "code": ["requests.get(url, timeout=5)"]},
+    {"title": "Sessions", "headings": ["Advanced", "Sessions"], "url": "https://docs/advanced", "library": "requests",
+     "best_paragraph": "Sessions reuse connections.",
+     "code": ["requests.get(url,  timeout=5)", "s = requests.Session()"]},
+]
+
+
+def test_compact_format_without_repr():
+    context = build_context(RESULTS)
+    assert context.startswith("[requests] Quickstart > Timeouts (https://docs/quickstart)\nPass timeout")
+    assert "'best_paragraph'" not in context and "\\n" not in context
+
+
+def test_repeated_code_is_dropped():
+    context = build_context(RESULTS)
+    assert context.count("timeout=5") == 1
+    assert "s = requests.Session()" in context
+
+
+def test_budget_truncates_at_sentence_boundary():
+    context = build_context(RESULTS, token_budget=30)
+    assert count_tokens(context) <= 30
+    assert "Pass timeout to stop waiting." in context
+    assert "whole download" not in context
+    assert "Sessions" not in context
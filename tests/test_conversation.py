@@ -0,0 +1,26 @@
+from scraping.conversation import Conversation, user_message
+
+
+def test_prompt_extends_previous_prompt():
+    conversation = Conversation(system_prompt="Be brief.")
+    first = conversation.messages(user_message("how to set a timeout", "Timeouts: pass timeout=5."))
+    conversation.add_turn(first[-1]["content"], "Use timeout=5.")
+    second = conversation.messages(user_message("and for a session?", "Sessions: ..."))
+    assert second[:len(first)] == first
+    assert second[len(first)] == {"role": "assistant", "content": "Use timeout=5."}
+    assert second[0] == {"role": "system", "content": "Be brief."}
+
+
+def test_context_comes_before_question():
+    content = user_message("how to set a timeout", "Timeouts: pass timeout=5.")
+    assert content.index("Timeouts") < content.index("Question: how to set a timeout")
+    assert user_message("hi") == "Question: hi"
+
+
+def test_history_trimmed_to_half_budget_when_over():
+    conversation = Conversation(history_tokens=40)
+    for i in range(5):
+        conversation.add_turn(f"question {i} " + "word " * 5, "answer " * 4)
+    conversation.messages("next")
+    assert conversation.history_size() <= 20
+    assert conversation.turns[-1][0].startswith("question 4")
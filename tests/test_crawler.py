@@ -0,0 +1,127 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scraping.crawler import HostLimiter
+from scraping.scrape import fetch_all_links, scrape_full_documentation
+from scraping.section_store import SECTIONS_FILE, iter_sections
+
+# /docs/<n>.html links to pages 2n and 2n + 1, a binary tree of documentation pages
+PAGES = 40
+
+
+class DocsHandler(BaseHTTPRequestHandler):
+    requests = []
+    not_modified = 0
+    edited = set()  # pages whose content changed since the first scrape
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with DocsHandler.lock:
+            DocsHandler.requests.append(self.path)
+            DocsHandler.in_flight += 1
+            DocsHandler.max_in_flight = max(DocsHandler.max_in_flight, DocsHandler.in_flight)
+        try:
+            time.sleep(0.02)
+            page = int(self.path.rsplit("/", 1)[-1].split(".")[0])
+            links = "".join(
+                f'<a href="/docs/{child}.html">Child</a>' for child in (2 * page, 2 * page + 1) if child < PAGES
+            )
+            version = 2 if page in DocsHandler.edited else 1
+            etag = f'"{page}-{version}"'
+            if self.headers.get("If-None-Match") == etag:
+                with DocsHandler.lock:
+                    DocsHandler.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            text = f"Page {page} of the fixture documentation, version {version}. " * 10
+            body = (
+                f'<html><body><h1>Page {page}</h1><p>{text}</p><a href="/docs/1.html">Home</a>{links}</body></html>'
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with DocsHandler.lock:
+                DocsHandler.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def docs_site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DocsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    DocsHandler.max_in_flight = 0
+    DocsHandler.requests = []
+    DocsHandler.not_modified = 0
+    DocsHandler.edited = set()
+    yield f"http://127.0.0.1:{server.server_port}/docs/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_crawl_keeps_breadth_first_tree(docs_site):
+    all_links, tree = fetch_all_links(docs_site + "1.html", "fixture", max_depth=3, workers=8)
+    url = lambda n: f"{docs_site}{n}.html"
+    crawled = {url(1)} | {child for children in tree.values() for child in children}
+    assert crawled == {url(n) for n in range(1, 16)}
+    assert tree[url(1)] == [url(2), url(3)]
+    assert tree[url(5)] == [url(10), url(11)]
+    assert url(8) not in tree  # depth 3: its links are found but not crawled
+    assert all_links == {url(n) for n in range(1, 32)}
+
+
+def test_per_host_concurrency_limit(docs_site):
+    limiter = HostLimiter(concurrency=2, requests_per_second=0)
+    fetch_all_links(docs_site + "1.html", "fixture", max_depth=5, workers=8, limiter=limiter)
+    assert DocsHandler.max_in_flight <= 2
+
+
+def test_per_host_rate_limit(docs_site):
+    limiter = HostLimiter(concurrency=8, requests_per_second=50)
+    started = time.perf_counter()
+    fetch_all_links(docs_site + "1.html", "fixture", max_depth=3, workers=8, limiter=limiter)
+    assert time.perf_counter() - started >= 14 / 50  # 15 pages, 1/50 s apart
+
+
+def test_scrape_downloads_each_page_once(docs_site, tmp_path):
+    (tmp_path / ".alexandria").mkdir()
+    num_sections, tree = scrape_full_documentation(docs_site + "1.html", "fixture", str(tmp_path), max_depth=2)
+    # Pages up to depth 2 are crawled and the pages they link to are scraped, each downloaded once
+    assert sorted(DocsHandler.requests) == sorted(f"/docs/{n}.html" for n in range(1, 16))
+    sections = list(iter_sections(tmp_path / ".alexandria" / "vectordb" / "fixture" / SECTIONS_FILE))
+    assert num_sections == len(sections) == 15
+    assert [section["title"] for section in sections[:3]] == ["Page 1", "Page 2", "Page 3"]
+    assert tree[docs_site + "1.html"] == [docs_site + "2.html", docs_site + "3.html"]
+
+
+def test_rescan_reuses_unchanged_pages(docs_site, tmp_path):
+    (tmp_path / ".alexandria").mkdir()
+    store = tmp_path / ".alexandria" / "vectordb" / "fixture" / SECTIONS_FILE
+    scrape_full_documentation(docs_site + "1.html", "fixture", str(tmp_path), max_depth=2, limiter=HostLimiter(requests_per_second=0))
+    first = list(iter_sections(store))
+
+    # Nothing changed: every page answers 304 and the stored sections come out the same
+    scrape_full_documentation(docs_site + "1.html", "fixture", str(tmp_path), max_depth=2, limiter=HostLimiter(requests_per_second=0))
+    assert DocsHandler.not_modified == 15
+    assert list(iter_sections(store)) == first
+
+    DocsHandler.edited = {5}
+    DocsHandler.not_modified = 0
+    scrape_full_documentation(docs_site + "1.html", "fixture", str(tmp_path), max_depth=2, limiter=HostLimiter(requests_per_second=0))
+    assert DocsHandler.not_modified == 14
+    sections = list(iter_sections(store))
+    assert [section["content"] for section in sections if "version 2" in section["content"][0]] == [sections[4]["content"]]
+    assert sections[:4] == first[:4] and sections[5:] == first[5:]
@@ -0,0 +1,76 @@
+import itertools
+import os
+
+import numpy as np
+
+from scraping import embedding_cache, models
+from scraping.embedding_cache import VECTORS_FILE, EmbeddingCache, cached_encode, text_hash
+
+KEYS = [text_hash(f"text {i}") for i in range(8)]
+
+
+def vector(i, dim=4):
+    return np.arange(dim, dtype=np.float32) + 10 * i
+
+
+def tick(monkeypatch):
+    """Make time.time() strictly increasing so last-used order is deterministic."""
+    clock = itertools.count(1000)
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: float(next(clock)))
+
+
+def test_encodes_each_new_text_once(tmp_path, stub_models):
+    encoder = stub_models[models.TEXT_MODEL_NAME]
+    cache = EmbeddingCache(tmp_path, models.TEXT_MODEL_NAME)
+    first = cached_encode(models.TEXT_MODEL_NAME, ["get", "post", "get"], cache)
+    assert encoder.encoded == 2  # the repeated text is encoded once
+    assert np.array_equal(first[0], first[2])
+
+    cache.save()
+    reloaded = EmbeddingCache(tmp_path, models.TEXT_MODEL_NAME)
+    again = cached_encode(models.TEXT_MODEL_NAME, ["post", "get", "put"], reloaded)
+    assert encoder.encoded == 3  # only "put" was new
+    np.testing.assert_allclose(again[:2], first[[1, 0]], atol=1e-3)  # stored as float16
+
+
+def test_reload_from_disk(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model/name")
+    cache.put_many(KEYS[:2], [vector(1), vector(2)])
+    cache.save()
+    reloaded = EmbeddingCache(tmp_path, "model/name")
+    found = reloaded.get_many(KEYS[:3])
+    assert sorted(found) == sorted(KEYS[:2])
+    np.testing.assert_array_equal(found[KEYS[1]], vector(2))
+
+
+def test_eviction_keeps_most_recently_used_rows(tmp_path, monkeypatch):
+    tick(monkeypatch)
+    row_bytes = 4 * 2  # dim 4, float16
+    max_bytes = 5 * row_bytes  # evicts down to 80%: 4 rows
+    cache = EmbeddingCache(tmp_path, "m", max_bytes=max_bytes)
+    for i in range(5):
+        cache.put_many([KEYS[i]], [vector(i)])
+        cache.save()
+    cache.get_many([KEYS[0]])  # KEYS[1] and KEYS[2] are now the least recently used
+    cache.put_many([KEYS[5]], [vector(5)])
+    cache.save()
+
+    assert os.path.getsize(tmp_path / "m" / VECTORS_FILE) == 4 * row_bytes
+    assert len(cache) == 4
+
+    # Rows were renumbered by the compaction; every key still reads its own vector
+    reloaded = EmbeddingCache(tmp_path, "m", max_bytes=max_bytes)
+    found = reloaded.get_many(KEYS)
+    assert sorted(found) == sorted([KEYS[0], KEYS[3], KEYS[4], KEYS[5]])
+    for key, value in found.items():
+        np.testing.assert_array_equal(value, vector(KEYS.index(key)))
+
+    # Below the cap again, the next save only appends
+    reloaded.put_many([KEYS[6]], [vector(6)])
+    reloaded.save()
+    assert len(EmbeddingCache(tmp_path, "m", max_bytes=max_bytes)) == 5
+
+
+def test_text_hash_ignores_where_text_came_from():
+    assert text_hash("Session objects") == text_hash("Session objects")
+    assert text_hash("Session objects") != text_hash("session objects")
@@ -0,0 +1,46 @@
+import glob
+import os
+
+import pytest
+
+from scraping.html_parser import parse_html_parser, parse_page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks", "fixtures", "html")
+PAGES = sorted(glob.glob(os.path.join(FIXTURES, "*.html")))
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8", newline="") as file:  # keep CRLF line endings
+        return file.read()
+
+
+@pytest.mark.parametrize("path", PAGES, ids=os.path.basename)
+def test_lxml_matches_html_parser(path):
+    pytest.importorskip("lxml")
+    from scraping.html_parser import parse_lxml
+
+    html = read(path)
+    anchors, sections = parse_lxml(html, "https://docs.example.com/page")
+    expected_anchors, expected_sections = parse_html_parser(html, "https://docs.example.com/page")
+    assert sorted(anchors) == sorted(expected_anchors)
+    assert sections == expected_sections
+
+
+def test_edge_cases():
+    anchors, sections = parse_page(read(os.path.join(FIXTURES, "edge_cases.html")), "u")
+    assert ("/docs/a", "Docs A") in anchors
+    assert sections[0]["content"][0].endswith("end.After the comment.")  # no script, style or comment text
+    assert sections[0]["code"][1].endswith("return    1")  # whitespace kept inside <pre>
+    assert [section["title"] for section in sections] == [
+        "Edge cases¶", "Nested code", "Long paragraph", "Line breaks", "Windows line endings", "Empty heading follows",
+    ]
+    assert sections[-2]["content"] == ["Saved\nwith CRLF\nand lone CR."]
+    assert sections[-2]["code"] == ["a = 1\nb = 2"]
+    assert sections[-1]["content"] == ["Still under the previous heading."]
+
+
+def test_short_pages_have_no_sections():
+    assert parse_page("<html><body><h1>Redirecting</h1><a href='/docs/'>docs</a></body></html>", "u") == (
+        [("/docs/", "docs")], None,
+    )
+    assert parse_page("", "u") == ([], None)
@@ -0,0 +1,72 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scraping.http_client import HttpClient
+
+BODY = b"documentation " * 200
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    failures = 0
+
+    def do_GET(self):
+        if self.path == "/flaky" and Handler.failures < 2:
+            Handler.failures += 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = BODY
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Handler.failures = 0
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_reused_and_counted(server):
+    client = HttpClient(backoff=0)
+    url = f"http://127.0.0.1:{server.server_port}/docs"
+    for _ in range(5):
+        assert client.get(url).content == BODY  # gzip decoded transparently
+    stats = client.stats()["127.0.0.1"]
+    assert stats["requests"] == 5
+    assert stats["connections"] == 1
+    assert stats["reuse_ratio"] == pytest.approx(0.8)
+    assert 0 < stats["bytes"] < 5 * len(BODY)  # compressed bytes on the wire
+
+
+def test_failed_requests_retried(server):
+    client = HttpClient(backoff=0)
+    response = client.get(f"http://127.0.0.1:{server.server_port}/flaky")
+    assert response.status_code == 200
+    assert Handler.failures == 2
+
+
+def test_reconnects_counted(server):
+    client = HttpClient(backoff=0)
+    url = f"http://127.0.0.1:{server.server_port}/docs"
+    for _ in range(3):
+        client.get(url, headers={"Connection": "close"})
+    stats = client.stats()["127.0.0.1"]
+    assert stats["connections"] == 3
+    assert stats["reuse_ratio"] == 0.0
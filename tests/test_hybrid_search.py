@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from alexandria.cli import cli
+from scraping import search
+from scraping.section_store import SectionWriter
+
+SECTIONS = [
+    {"title": "Sessions", "content": ["Session objects keep cookies across requests."], "code": []},
+    {"title": "Timeouts", "content": ["Pass a timeout in seconds so a request never hangs."], "code": ["requests.get(url, timeout=5)"]},
+    {"title": "Redirects", "content": ["Redirects are followed for every verb except HEAD."], "code": []},
+]
+
+
+@pytest.fixture
+def workspace(tmp_path, stub_models):
+    """A .alexandria directory with one indexed library."""
+    alexandria_path = tmp_path / ".alexandria"
+    with SectionWriter(alexandria_path / "vectordb" / "requests") as writer:
+        writer.write({**sec, "headings": [sec["title"]], "url": f"https://docs.example.com/{sec['title'].lower()}"} for sec in SECTIONS)
+    assert search.update_indexes(str(alexandria_path)) == 1
+    return alexandria_path
+
+
+def titles(results):
+    return [result["title"] for result in results]
+
+
+def test_reciprocal_rank_fusion():
+    assert search.reciprocal_rank_fusion([["a", "b", "c"], ["b", "c"]]) == ["b", "c", "a"]
+    assert search.reciprocal_rank_fusion([["a", "b"], ["b", "a"]], k=0) == ["a", "b"]  # ties keep first-seen order
+    assert search.reciprocal_rank_fusion([]) == []
+
+
+def test_bm25_candidates_merge_by_rank_across_shards():
+    # The large shard's BM25 scores are inflated by its own IDF and paragraph lengths
+    candidates = [
+        ("large", {"title": [(0, -0.5)], "bm25": [(0, 40.0), (1, 35.0), (2, 30.0)]}),
+        ("small", {"title": [(0, -0.2)], "bm25": [(0, 4.0), (1, 1.0)]}),
+    ]
+    merged = search.merge_candidates(candidates, "bm25", 4)
+    assert sorted(merged[:2]) == [("large", 0), ("small", 0)]  # each shard's best first
+    assert merged[2:] == [("large", 1), ("small", 1)]  # 35/40 of its shard's best beats 1/4
+    assert search.merge_candidates(candidates, "title", 2) == [("small", 0), ("large", 0)]  # distances do compare
+
+
+def test_zero_budget_disables_a_signal(workspace):
+    # "cookies" is only in the Sessions paragraph, so only BM25 can find it
+    bm25_only = search.SearchEngine(str(workspace), budgets={"title": 0, "code": 0})
+    assert titles(bm25_only.search("cookies", k=1)) == ["Sessions"]
+
+    shard = bm25_only.shards["requests"]
+    candidates, _ = shard.candidates(["cookies"], bm25_only.text_model.encode(["cookies"]), None, bm25_only.budgets)
+    assert candidates[0]["title"] == [] and candidates[0]["code"] == []
+    assert candidates[0]["bm25"][0][0] == 0
+
+    # Without BM25 and code search, hybrid ranks like title mode
+    title_only = search.SearchEngine(str(workspace), budgets={"bm25": 0, "code": 0})
+    assert titles(title_only.search("redirects", k=3)) == titles(title_only.search("redirects", k=3, mode="title"))
+    assert titles(title_only.search("redirects", k=1)) == ["Redirects"]
+
+
+def test_query_batch_title_mode(workspace, tmp_path):
+    questions = tmp_path / "questions.txt"
+    questions.write_text("How do timeouts work?\n{\"query\": \"cookies\"}\n", encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+
+    result = CliRunner().invoke(cli, ["query-batch", str(questions), str(tmp_path), "-o", str(output), "-k", "1", "--search-mode", "title"])
+    assert result.exit_code == 0, result.output
+
+    lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [line["clean_query"] for line in lines] == ["timeouts work", "cookies"]
+    assert titles(lines[0]["results"]) == ["Timeouts"]
+    assert len(lines[1]["results"]) == 1  # title mode still returns k results for a query no title matches
@@ -0,0 +1,71 @@
+import os
+import shutil
+
+from scraping import index_store, models, search
+from scraping.section_store import SectionWriter, iter_sections
+
+
+def section(title, topic):
+    content = f"{topic} " + " ".join(f"word{i}" for i in range(40))  # long enough to be its own chunk
+    return {"title": title, "headings": [title], "content": [content], "code": [], "url": f"https://docs.example.com/{topic}"}
+
+
+def write_docs(directory, sections):
+    library_path = os.path.join(directory, "vectordb", "requests")
+    with SectionWriter(library_path) as writer:
+        writer.write(sections)
+    return os.path.join(library_path, "sections.jsonl")
+
+
+def shard_titles(store_path):
+    index_path = os.path.join(os.path.dirname(store_path), index_store.SHARD_INDEX_DIR)
+    return [chunk["title"] for chunk in iter_sections(os.path.join(index_path, index_store.CHUNKS_FILE))]
+
+
+def test_rescan_only_encodes_changed_sections(tmp_path, stub_models):
+    encoder = stub_models[models.TEXT_MODEL_NAME]
+    docs = [section("Sessions", "sessions"), section("Timeouts", "timeouts"), section("Redirects", "redirects")]
+    store_path = write_docs(tmp_path, docs)
+    assert search.update_shard(tmp_path, store_path) == 3
+    assert encoder.encoded == 3
+
+    # Unchanged docs, even rewritten by a rescrape, encode nothing
+    write_docs(tmp_path, docs)
+    assert search.update_shard(tmp_path, store_path) == 3
+    assert encoder.encoded == 3
+
+    # Without the embedding cache, only the edited section goes through the encoder
+    shutil.rmtree(tmp_path / "embedding_cache")
+    docs[1] = section("Timeouts and retries", "retries")
+    write_docs(tmp_path, docs)
+    assert search.update_shard(tmp_path, store_path) == 3
+    assert encoder.encoded == 4
+    assert shard_titles(store_path) == ["Sessions", "Timeouts and retries", "Redirects"]
+
+    # Removed sections leave the shard
+    write_docs(tmp_path, docs[:1])
+    assert search.update_shard(tmp_path, store_path) == 1
+    assert encoder.encoded == 4
+    assert shard_titles(store_path) == ["Sessions"]
+    index_path = os.path.join(os.path.dirname(store_path), index_store.SHARD_INDEX_DIR)
+    manifest = index_store.load_manifest(index_path)
+    assert len(manifest["libraries"][os.path.relpath(store_path, tmp_path)]["sections"]) == 1
+    assert search.load_shards(tmp_path)["requests"].title_index.ntotal == 1
+
+
+def test_empty_library_is_not_rebuilt_on_every_load(tmp_path, stub_models, monkeypatch, capsys):
+    store_path = write_docs(tmp_path, [])
+    assert search.update_indexes(tmp_path) is None
+
+    chunked = []
+    write_chunks = search.write_chunks
+    monkeypatch.setattr(search, "write_chunks", lambda *args: chunked.append(args) or write_chunks(*args))
+    assert search.load_shards(tmp_path) == {}
+    assert search.update_shard(tmp_path, store_path) == 0
+    assert chunked == []
+    assert "rebuilding" not in capsys.readouterr().out
+
+    # New sections in the store are picked up
+    write_docs(tmp_path, [section("Sessions", "sessions")])
+    assert list(search.load_shards(tmp_path)) == ["requests"]
+    assert len(chunked) == 1
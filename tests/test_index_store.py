@@ -0,0 +1,22 @@
+import os
+
+import numpy as np
+import pytest
+
+from scraping.ann_index import build_faiss_index
+from scraping.index_store import read_faiss_index, write_faiss_index
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs /proc/self/maps")
+@pytest.mark.parametrize("index_type,quantization", [("flat", "none"), ("flat", "fp16"), ("flat", "int8"), ("hnsw", "fp16")])
+def test_saved_index_is_memory_mapped(tmp_path, index_type, quantization):
+    vectors = np.random.default_rng(0).random((500, 32), dtype=np.float32)
+    path = str(tmp_path / f"{index_type}-{quantization}.index")
+    write_faiss_index(build_faiss_index(vectors, index_type, quantization), path)
+
+    index = read_faiss_index(path)
+    with open("/proc/self/maps", "r", encoding="utf-8") as file:
+        assert path in file.read()
+    _, ids = index.search(vectors[:1], 1)
+    assert ids[0][0] == 0
+    assert not os.path.exists(path + ".tmp")
@@ -0,0 +1,36 @@
+import sys
+import threading
+import types
+
+from scraping import models
+
+
+def test_model_load_does_not_block_other_resources(monkeypatch):
+    loading, release = threading.Event(), threading.Event()
+
+    class SlowModel:
+        def __init__(self, name):
+            loading.set()
+            assert release.wait(5)
+            self.name = name
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(SentenceTransformer=SlowModel))
+    monkeypatch.setitem(sys.modules, "ollama", types.SimpleNamespace(Client=object))
+    monkeypatch.setattr(models, "_models", {"fast": "fast model"})
+    monkeypatch.setattr(models, "_model_locks", {})
+    monkeypatch.setattr(models, "_llm_client", None)
+
+    loaded = []
+    thread = threading.Thread(target=lambda: loaded.append(models.get_model("slow")))
+    thread.start()
+    try:
+        assert loading.wait(5)
+        # Both return while "slow" is still loading
+        assert models.get_model("fast") == "fast model"
+        assert models.get_llm_client() is not None
+        assert not loaded
+    finally:
+        release.set()
+        thread.join(5)
+    assert loaded[0].name == "slow"
+    assert models.get_model("slow") is loaded[0]
@@ -0,0 +1,51 @@
+import json
+import os
+from scraping.section_store import (
+    LEGACY_DOCS_FILE, OFFSETS_FILE, SECTIONS_FILE, SectionStore, SectionWriter, iter_sections, migrate_legacy_docs,
+)
+
+SECTIONS = [
+    {"title": "Quickstart", "content": ["Install it."], "code": ["pip install requests"], "url": "a"},
+    {"title": "Timeouts ⏱", "content": [], "code": [], "url": "b"},
+    {"title": "Sessions", "content": ["Sessions persist cookies.", "They reuse connections."], "code": [], "url": "c"},
+]
+
+
+def test_write_stream_and_random_access(tmp_path):
+    with SectionWriter(tmp_path) as writer:
+        writer.write(SECTIONS[:1])  # one page at a time
+        writer.write(SECTIONS[1:])
+    path = tmp_path / SECTIONS_FILE
+    assert list(iter_sections(path)) == SECTIONS
+    store = SectionStore(str(path))
+    assert len(store) == 3
+    assert store[2] == SECTIONS[2]
+    assert store[1]["title"] == "Timeouts ⏱"
+
+
+def test_failed_write_keeps_previous_store(tmp_path):
+    with SectionWriter(tmp_path) as writer:
+        writer.write(SECTIONS)
+    try:
+        with SectionWriter(tmp_path) as writer:
+            writer.write(SECTIONS[:1])
+            raise RuntimeError("scrape failed")
+    except RuntimeError:
+        pass
+    assert len(SectionStore(str(tmp_path / SECTIONS_FILE))) == 3
+    assert not os.path.exists(tmp_path / (SECTIONS_FILE + ".tmp"))
+
+
+def test_offsets_rebuilt_when_missing(tmp_path):
+    with SectionWriter(tmp_path) as writer:
+        writer.write(SECTIONS)
+    os.remove(tmp_path / OFFSETS_FILE)
+    assert SectionStore(str(tmp_path / SECTIONS_FILE))[1] == SECTIONS[1]
+
+
+def test_migrate_legacy_docs(tmp_path):
+    library = tmp_path / "vectordb" / "requests"
+    library.mkdir(parents=True)
+    (library / LEGACY_DOCS_FILE).write_text(json.dumps(SECTIONS, indent=4), encoding="utf-8")
+    migrate_legacy_docs(str(tmp_path))
+    assert list(iter_sections(library / SECTIONS_FILE)) == SECTIONS
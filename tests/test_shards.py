@@ -0,0 +1,25 @@
+import numpy as np
+from scraping.shards import Shard, ShardRouter
+
+
+def make_shards(names):
+    return {
+        name: Shard(name, None, None, None, [], [], np.eye(len(names), dtype=np.float32)[i])
+        for i, name in enumerate(names)
+    }
+
+
+def test_route_to_mentioned_library():
+    router = ShardRouter(make_shards(["flask", "scikit-learn", "numpy"]))
+    assert router.route("flask route decorator", np.zeros(3)) == ["flask"]
+    assert router.route("scikit learn pipeline", np.zeros(3)) == ["scikit-learn"]
+
+
+def test_route_prefers_workspace_libraries():
+    router = ShardRouter(make_shards(["flask", "django", "numpy"]), workspace_libraries={"numpy"})
+    assert router.route("array broadcasting", np.zeros(3)) == ["numpy"]
+
+
+def test_route_by_centroid_when_too_many_shards():
+    router = ShardRouter(make_shards(["a", "b", "c", "d"]), max_shards=2)
+    assert router.route("something", np.array([0.1, 0.0, 0.9, 0.5])) == ["c", "d"]
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import subprocess
+
+# Startup-time benchmark: `alexandria --help` must not load models or heavy libraries.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["sentence_transformers", "torch", "faiss", "ollama", "nltk", "prompt_toolkit", "requests", "bs4"]
+STARTUP_BUDGET_MS = float(os.environ.get("ALEXANDRIA_STARTUP_BUDGET_MS", "400"))
+RUNS = 5
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+
+def time_help():
+    """Best-of-RUNS wall time in milliseconds for `alexandria --help`."""
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "alexandria.cli", "--help"], cwd=REPO_ROOT, capture_output=True, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def test_cli_import_is_lightweight():
+    result = run_python(
+        "import sys, alexandria.cli; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_help_under_budget():
+    assert time_help() < STARTUP_BUDGET_MS
+
+
+if __name__ == "__main__":
+    print(f"alexandria --help: {time_help():.1f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)")